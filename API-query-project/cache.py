@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+def default_cache_path() -> str:
+    """Return $XDG_CACHE_HOME/suninfo/responses.sqlite3 (~/.cache by default)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "suninfo", "responses.sqlite3")
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of sunrise-sunset.org results.
+
+    Entries are keyed on latitude/longitude rounded to `precision` decimal
+    places plus the date. The least recently used rows are evicted once the
+    cache holds more than `max_entries`, and rows older than `ttl` seconds
+    (if set) count as misses. WAL mode and a busy timeout let several
+    processes share one cache file safely.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        precision: int = 4,
+        max_entries: int = 100_000,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self.path = path or default_cache_path()
+        self.precision = precision
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._con:
+            # One write transaction, so no process inserts between the initial
+            # count and the triggers that keep it current.
+            self._con.execute("BEGIN IMMEDIATE")
+            self._con.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    lat       REAL NOT NULL,
+                    lng       REAL NOT NULL,
+                    date      TEXT NOT NULL,
+                    results   TEXT NOT NULL,
+                    created   REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (lat, lng, date)
+                )
+            """)
+            self._con.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+            )
+            # Row count kept by triggers, so put() never runs COUNT(*).
+            self._con.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name   TEXT PRIMARY KEY,
+                    value  INTEGER NOT NULL
+                )
+            """)
+            self._con.execute(
+                "INSERT OR IGNORE INTO counters SELECT 'entries', COUNT(*) FROM responses"
+            )
+            self._con.execute("""
+                CREATE TRIGGER IF NOT EXISTS responses_count_insert AFTER INSERT ON responses
+                BEGIN
+                    UPDATE counters SET value = value + 1 WHERE name = 'entries';
+                END
+            """)
+            self._con.execute("""
+                CREATE TRIGGER IF NOT EXISTS responses_count_delete AFTER DELETE ON responses
+                BEGIN
+                    UPDATE counters SET value = value - 1 WHERE name = 'entries';
+                END
+            """)
+
+    def key(self, latitude: float, longitude: float, date: str) -> Tuple[float, float, str]:
+        return round(latitude, self.precision), round(longitude, self.precision), date
+
+    def get(self, latitude: float, longitude: float, date: str) -> Optional[Dict[str, Any]]:
+        """Return the cached results, or None on a miss."""
+        key = self.key(latitude, longitude, date)
+        now = time.time()
+
+        with self._lock, self._con:
+            row = self._con.execute(
+                "SELECT results, created FROM responses WHERE lat = ? AND lng = ? AND date = ?",
+                key,
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+
+            self._con.execute(
+                "UPDATE responses SET last_used = ? WHERE lat = ? AND lng = ? AND date = ?",
+                (now, *key),
+            )
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, latitude: float, longitude: float, date: str, results: Dict[str, Any]) -> None:
+        """Store results and evict the least recently used rows beyond max_entries."""
+        now = time.time()
+
+        with self._lock, self._con:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+            # does not fire the delete trigger, which would inflate the count.
+            self._con.execute(
+                """
+                INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (lat, lng, date) DO UPDATE SET
+                    results = excluded.results,
+                    created = excluded.created,
+                    last_used = excluded.last_used
+                """,
+                (*self.key(latitude, longitude, date), json.dumps(results), now, now),
+            )
+            count = self._entries()
+            if count > self.max_entries:
+                self._con.execute(
+                    """
+                    DELETE FROM responses WHERE rowid IN (
+                        SELECT rowid FROM responses ORDER BY last_used ASC LIMIT ?
+                    )
+                    """,
+                    (count - self.max_entries,),
+                )
+
+    def _entries(self) -> int:
+        (count,) = self._con.execute(
+            "SELECT value FROM counters WHERE name = 'entries'"
+        ).fetchone()
+        return count
+
+    def clear(self) -> None:
+        """Delete every cached response."""
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        """Hits and misses seen by this process, plus the number of cached rows."""
+        with self._lock:
+            entries = self._entries()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,156 @@
+"""
+Offline sunrise/sunset calculator based on the NOAA solar position algorithm
+(https://gml.noaa.gov/grad/solcalc/calcdetails.html).
+
+Every function accepts scalars or NumPy arrays, so whole batches of
+(latitude, longitude, date) triples are solved in one vectorized call.
+Times are UTC and match the fields returned by api.sunrise-sunset.org.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Zenith of the sun's upper limb at sunrise/sunset, including refraction.
+SUNRISE_ZENITH = 90.833
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+
+def _julian_day(dates) -> np.ndarray:
+    """Julian day at 00:00 UTC for each date (YYYY-MM-DD strings or datetime64)."""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    return days + UNIX_EPOCH_JD
+
+
+def _sun_position(jd: np.ndarray):
+    """Return the sun's declination (degrees) and the equation of time (minutes)."""
+    jc = (jd - J2000_JD) / 36525.0
+
+    mean_long = np.mod(280.46646 + jc * (36000.76983 + jc * 0.0003032), 360.0)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    center = (
+        np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * mean_anom) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = np.radians(mean_long + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.degrees(np.arcsin(np.sin(obliq) * np.sin(apparent_long)))
+
+    y = np.tan(obliq / 2) ** 2
+    long_rad = np.radians(mean_long)
+    eq_time = 4 * np.degrees(
+        y * np.sin(2 * long_rad)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * long_rad)
+        - 0.5 * y * y * np.sin(4 * long_rad)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+    return declination, eq_time
+
+
+def _hour_angle_cos(latitude: np.ndarray, declination: np.ndarray) -> np.ndarray:
+    """Cosine of the sunrise hour angle; outside [-1, 1] the sun never rises or sets."""
+    lat = np.radians(latitude)
+    dec = np.radians(declination)
+    return (
+        np.cos(np.radians(SUNRISE_ZENITH)) / (np.cos(lat) * np.cos(dec))
+        - np.tan(lat) * np.tan(dec)
+    )
+
+
+def _event_minutes(latitude, longitude, jd, direction: int, iterations: int = 2):
+    """
+    Minutes after 00:00 UTC of the event: -1 sunrise, 0 solar noon, +1 sunset.
+    The sun's position is re-evaluated at each estimate to refine the time.
+    """
+    minutes = 720.0 - 4.0 * longitude
+    cos_ha = np.zeros_like(minutes)
+
+    for _ in range(iterations):
+        declination, eq_time = _sun_position(jd + minutes / 1440.0)
+        cos_ha = _hour_angle_cos(latitude, declination)
+        hour_angle = np.degrees(np.arccos(np.clip(cos_ha, -1.0, 1.0)))
+        minutes = 720.0 - 4.0 * longitude - eq_time + direction * 4.0 * hour_angle
+
+    return minutes, cos_ha
+
+
+def sun_times(latitude, longitude, dates) -> Dict[str, np.ndarray]:
+    """
+    Solve sunrise, solar noon and sunset for broadcastable arrays of
+    latitude, longitude (degrees, east positive) and dates.
+
+    Returns minutes after 00:00 UTC of each date (sunset may exceed 1440 or
+    sunrise go negative west/east of Greenwich), the day length in minutes,
+    and polar_day / polar_night masks. Sunrise and sunset are NaN when the
+    sun does not cross the horizon that day.
+    """
+    latitude, longitude, jd = np.broadcast_arrays(
+        np.asarray(latitude, dtype=float),
+        np.asarray(longitude, dtype=float),
+        _julian_day(dates).astype(float),
+    )
+
+    noon, _ = _event_minutes(latitude, longitude, jd, 0, iterations=1)
+    sunrise, cos_rise = _event_minutes(latitude, longitude, jd, -1)
+    sunset, cos_set = _event_minutes(latitude, longitude, jd, +1)
+
+    polar_night = (cos_rise > 1.0) & (cos_set > 1.0)
+    polar_day = (cos_rise < -1.0) & (cos_set < -1.0)
+    no_event = (np.abs(cos_rise) > 1.0) | (np.abs(cos_set) > 1.0)
+
+    day_length = np.where(polar_day, 1440.0, np.where(polar_night, 0.0, sunset - sunrise))
+
+    return {
+        "sunrise": np.where(no_event, np.nan, sunrise),
+        "solar_noon": noon,
+        "sunset": np.where(no_event, np.nan, sunset),
+        "day_length": np.clip(day_length, 0.0, 1440.0),
+        "polar_day": polar_day,
+        "polar_night": polar_night,
+    }
+
+
+def format_clock(minutes: float) -> Optional[str]:
+    """Format minutes after midnight UTC as the API does, e.g. '7:27:02 AM'."""
+    if np.isnan(minutes):
+        return None
+    seconds = int(round(minutes * 60)) % 86400
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours % 12 or 12}:{rest // 60:02d}:{rest % 60:02d} {'AM' if hours < 12 else 'PM'}"
+
+
+def format_duration(minutes: float) -> str:
+    """Format a duration in minutes as the API does, e.g. '9:32:14'."""
+    seconds = int(round(minutes * 60))
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def sun_info(latitude, longitude, dates) -> List[Dict[str, Any]]:
+    """
+    Vectorized solve, returned as API-style result dicts with 'sunrise',
+    'sunset', 'solar_noon' and 'day_length' strings, one per input triple.
+    """
+    times = sun_times(latitude, longitude, dates)
+    return [
+        {
+            "sunrise": format_clock(rise),
+            "sunset": format_clock(set_),
+            "solar_noon": format_clock(noon),
+            "day_length": format_duration(length),
+        }
+        for rise, set_, noon, length in zip(
+            times["sunrise"].ravel(),
+            times["sunset"].ravel(),
+            times["solar_noon"].ravel(),
+            times["day_length"].ravel(),
+        )
+    ]
@@ -1,16 +1,45 @@
+import argparse
+import csv
 import datetime
 import json
-from typing import Optional, Dict, Any
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+import solar
+from cache import ResponseCache
 
 
 class SunInfo:
-    """Fetch sunrise, sunset, and day length information from sunrise-sunset.org."""
+    """
+    Sunrise, sunset, and day length information for one location and date.
+
+    The "api" backend queries sunrise-sunset.org; the "local" backend solves
+    the NOAA solar position equations offline (see solar.py). An optional
+    ResponseCache stores API results on disk so repeated lookups of the same
+    location and date never reach the network.
+    """
 
     BASE_URL = "https://api.sunrise-sunset.org/json"
+    BACKENDS = ("api", "local")
+
+    def __init__(
+        self,
+        latitude: float,
+        longitude: float,
+        date_str: str = "today",
+        backend: str = "api",
+        cache: Optional[ResponseCache] = None,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; choose from {self.BACKENDS}")
 
-    def __init__(self, latitude: float, longitude: float, date_str: str = "today") -> None:
         self.latitude = float(latitude)
         self.longitude = float(longitude)
         self.date = (
@@ -18,31 +47,63 @@ class SunInfo:
             if date_str.lower() == "today"
             else date_str
         )
-        self.data = self._query_api()
+        self.backend = backend
+        self.cache = cache
+        self.session = session
+        self.data = self._query_api() if backend == "api" else self._query_local()
 
-    def _query_api(self) -> Optional[Dict[str, Any]]:
-        """Query the API and return the parsed JSON response."""
+    @classmethod
+    def fetch(
+        cls,
+        latitude: float,
+        longitude: float,
+        date: str,
+        session: Optional[requests.Session] = None,
+    ) -> Dict[str, Any]:
+        """Call the API once and return its results; raises on any failure."""
         params = {
-            "lat": self.latitude,
-            "lng": self.longitude,
-            "date": self.date,
+            "lat": latitude,
+            "lng": longitude,
+            "date": date,
             "formatted": 1,
         }
 
+        response = (session or requests).get(cls.BASE_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") != "OK":
+            raise ValueError(f"API error: {data.get('status')}")
+
+        return data["results"]
+
+    def _query_api(self) -> Optional[Dict[str, Any]]:
+        """Query the API (or the cache) and return the parsed JSON response."""
+        if self.cache is not None:
+            cached = self.cache.get(self.latitude, self.longitude, self.date)
+            if cached is not None:
+                return cached
+
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            results = self.fetch(self.latitude, self.longitude, self.date, self.session)
 
-            if data.get("status") != "OK":
-                raise ValueError(f"API error: {data.get('status')}")
+            if self.cache is not None:
+                self.cache.put(self.latitude, self.longitude, self.date, results)
 
-            return data["results"]
+            return results
 
         except Exception as exc:
             print(f"Failed to retrieve data: {exc}")
             return None
 
+    def _query_local(self) -> Optional[Dict[str, Any]]:
+        """Compute the same fields as the API with the offline NOAA solver."""
+        try:
+            return solar.sun_info(self.latitude, self.longitude, self.date)[0]
+        except ValueError as exc:
+            print(f"Failed to compute data: {exc}")
+            return None
+
     def get_sunrise(self) -> Optional[str]:
         return self.data.get("sunrise") if self.data else None
 
@@ -53,15 +114,216 @@ class SunInfo:
         return self.data.get("day_length") if self.data else None
 
 
+# ------------------------------
+# Batch mode
+# ------------------------------
+BATCH_FIELDS = ["latitude", "longitude", "date", "sunrise", "sunset", "day_length", "error"]
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` calls per second, bursting to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def read_queries(input_path: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (latitude, longitude, date) rows from a CSV, skipping a header row if present."""
+    with open(input_path, newline="", encoding="utf-8") as f:
+        for index, row in enumerate(csv.reader(f)):
+            if len(row) < 3 or not "".join(row).strip():
+                continue
+            if index == 0:
+                try:
+                    float(row[0])
+                except ValueError:
+                    continue  # header
+            yield row[0].strip(), row[1].strip(), row[2].strip()
+
+
+def lookup_with_retries(
+    latitude: float,
+    longitude: float,
+    date: str,
+    session: requests.Session,
+    limiter: Optional[TokenBucket] = None,
+    retries: int = 3,
+    backoff: float = 0.5,
+    cache: Optional[ResponseCache] = None,
+) -> Dict[str, Any]:
+    """Fetch one result, retrying transient HTTP failures with exponential backoff and jitter."""
+    if cache is not None:
+        cached = cache.get(latitude, longitude, date)
+        if cached is not None:
+            return cached
+
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            results = SunInfo.fetch(latitude, longitude, date, session)
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as exc:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+            transient = status is None or status in RETRYABLE_STATUS
+            if not transient or attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+    if cache is not None:
+        cache.put(latitude, longitude, date, results)
+    return results
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = 8,
+    rate: float = 10.0,
+    retries: int = 3,
+    backend: str = "api",
+    cache: Optional[ResponseCache] = None,
+) -> Dict[str, int]:
+    """
+    Look up every (latitude, longitude, date) row of input_path concurrently
+    and stream results to output_path as they complete.
+
+    API calls share one pooled requests.Session across a thread pool, are
+    throttled by a token bucket of `rate` requests per second and retried
+    with backoff. Identical queries that are in flight at the same time are
+    sent once. At most a few batches of `workers` rows are held in memory.
+    Returns counts of rows written, failed rows and API calls made.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    limiter = TokenBucket(rate) if rate > 0 else None
+
+    inflight: Dict[Tuple[float, float, str], Future] = {}
+    waiting: Dict[Future, Tuple[Tuple[float, float, str], List[Tuple[str, str, str]]]] = {}
+    stats = {"rows": 0, "errors": 0, "lookups": 0}
+
+    def lookup(latitude: float, longitude: float, date: str) -> Dict[str, Any]:
+        if backend == "local":
+            return solar.sun_info(latitude, longitude, date)[0]
+        return lookup_with_retries(latitude, longitude, date, session, limiter, retries, cache=cache)
+
+    with open(output_path, "w", newline="", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=BATCH_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+        def flush(done) -> None:
+            for future in done:
+                key, rows = waiting.pop(future)
+                del inflight[key]
+                try:
+                    results, error = future.result(), ""
+                except Exception as exc:
+                    results, error = {}, str(exc)
+
+                for latitude, longitude, date in rows:
+                    writer.writerow({
+                        "latitude": latitude, "longitude": longitude, "date": date,
+                        **results, "error": error,
+                    })
+                    stats["rows"] += 1
+                    stats["errors"] += bool(error)
+            out.flush()
+
+        for latitude, longitude, date in read_queries(input_path):
+            if date.lower() == "today":
+                date = datetime.date.today().strftime("%Y-%m-%d")
+            try:
+                key = (float(latitude), float(longitude), date)
+            except ValueError:
+                writer.writerow({"latitude": latitude, "longitude": longitude, "date": date,
+                                 "error": "invalid coordinates"})
+                stats["rows"] += 1
+                stats["errors"] += 1
+                continue
+
+            future = inflight.get(key)
+            if future is None:
+                future = pool.submit(lookup, *key)
+                inflight[key] = future
+                waiting[future] = (key, [])
+                stats["lookups"] += 1
+            waiting[future][1].append((latitude, longitude, date))
+
+            if len(waiting) >= workers * 4:
+                done, _ = wait(list(waiting), return_when=FIRST_COMPLETED)
+                flush(done)
+
+        while waiting:
+            done, _ = wait(list(waiting), return_when=FIRST_COMPLETED)
+            flush(done)
+
+    session.close()
+    return stats
+
+
 def main() -> None:
     """Command line interface for the SunInfo utility."""
+    parser = argparse.ArgumentParser(description="Sunrise and sunset times for a location.")
+    parser.add_argument("--backend", choices=SunInfo.BACKENDS, default="api",
+                        help="Query sunrise-sunset.org or compute offline")
+    parser.add_argument("--cache-path", default=None,
+                        help="SQLite response cache (default: ~/.cache/suninfo/responses.sqlite3)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the API")
+    parser.add_argument("--precision", type=int, default=4,
+                        help="Decimal places of lat/lon used as the cache key")
+    parser.add_argument("--batch", metavar="INPUT_CSV",
+                        help="Look up every latitude,longitude,date row of a CSV file")
+    parser.add_argument("--output", metavar="OUTPUT_CSV", default="suninfo_results.csv",
+                        help="Where batch results are written")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent batch lookups")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Maximum API requests per second in batch mode (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries per lookup on timeouts, 429 and 5xx responses")
+    args = parser.parse_args()
+
+    cache = None
+    if args.backend == "api" and not args.no_cache:
+        cache = ResponseCache(args.cache_path, precision=args.precision)
+
+    if args.batch:
+        start = time.perf_counter()
+        stats = run_batch(args.batch, args.output, args.workers, args.rate,
+                          args.retries, args.backend, cache)
+        print(f"Wrote {stats['rows']} row(s) to {args.output} in {time.perf_counter() - start:.1f}s "
+              f"({stats['lookups']} lookup(s), {stats['errors']} error(s))")
+        if cache is not None:
+            cache.close()
+        return
 
     while True:
         latitude = input("Enter the latitude: ").strip()
         longitude = input("Enter the longitude: ").strip()
         date_str = input("Enter the date (YYYY-MM-DD) or 'today': ").strip()
 
-        suninfo = SunInfo(latitude, longitude, date_str)
+        suninfo = SunInfo(latitude, longitude, date_str, backend=args.backend, cache=cache)
 
         print("\n--- Sun Information ---")
         print(f"Latitude:  {latitude}")
@@ -83,6 +345,11 @@ def main() -> None:
         if again != "y":
             break
 
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hit(s), {stats['misses']} miss(es), {stats['entries']} entries")
+        cache.close()
+
 
 if __name__ == "__main__":
     main()
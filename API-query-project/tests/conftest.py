@@ -0,0 +1,23 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+
+def load_sunrise_sunset():
+    """Import sunrise-sunset.py (its name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location(
+        "sunrise_sunset", os.path.join(PROJECT_DIR, "sunrise-sunset.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def sunrise_sunset():
+    return load_sunrise_sunset()
@@ -0,0 +1,38 @@
+"""
+Refresh tests/fixtures/sunrise_sunset.json from the live API.
+
+Each fixture's (lat, lng, date) is queried on api.sunrise-sunset.org and its
+results replaced with the API's sunrise, sunset, solar_noon and day_length.
+
+    python tests/record_fixtures.py
+"""
+import datetime
+import json
+import os
+
+from conftest import load_sunrise_sunset
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sunrise_sunset.json")
+FIELDS = ("sunrise", "sunset", "solar_noon", "day_length")
+
+
+def main():
+    SunInfo = load_sunrise_sunset().SunInfo
+
+    with open(FIXTURES, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    today = datetime.date.today().isoformat()
+    for fixture in fixtures:
+        results = SunInfo.fetch(fixture["lat"], fixture["lng"], fixture["date"])
+        fixture["results"] = {field: results[field] for field in FIELDS}
+        fixture["source"] = f"api.sunrise-sunset.org, recorded {today}"
+        print(f"{fixture['name']}: {fixture['results']}")
+
+    with open(FIXTURES, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+ResponseCache with SunInfo pointed at a local stub of the sunrise-sunset.org
+API, counting the requests that reach it.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import cache
+from cache import ResponseCache
+
+RESULTS = {
+    "sunrise": "6:20:56 AM",
+    "sunset": "6:29:35 PM",
+    "solar_noon": "12:25:07 PM",
+    "day_length": "12:08:39",
+}
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        body = json.dumps({"results": RESULTS, "status": "OK"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api(sunrise_sunset, monkeypatch):
+    """Start the stub, point SunInfo.BASE_URL at it and yield the handler class."""
+    StubAPI.requests = 0
+    server = HTTPServer(("127.0.0.1", 0), StubAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        sunrise_sunset.SunInfo, "BASE_URL", f"http://127.0.0.1:{server.server_port}/json"
+    )
+    yield StubAPI
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "responses.sqlite3")
+
+
+def test_repeated_lookup_calls_the_api_once(sunrise_sunset, api, cache_path):
+    responses = ResponseCache(cache_path)
+    first = sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=responses)
+    second = sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=responses)
+
+    assert api.requests == 1
+    assert first.data == second.data == RESULTS
+    assert responses.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_nearby_coordinates_share_an_entry(sunrise_sunset, api, cache_path):
+    responses = ResponseCache(cache_path, precision=3)
+    sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=responses)
+    sunrise_sunset.SunInfo(36.72024, -4.42041, "2024-03-20", cache=responses)
+
+    assert api.requests == 1
+    assert responses.hits == 1
+
+
+def test_second_cache_on_the_same_file_hits(sunrise_sunset, api, cache_path):
+    writer = ResponseCache(cache_path)
+    sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=writer)
+    writer.close()
+
+    reader = ResponseCache(cache_path)
+    info = sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=reader)
+
+    assert api.requests == 1
+    assert info.data == RESULTS
+    assert reader.hits == 1 and reader.misses == 0
+
+
+def test_lru_eviction_keeps_the_cap(cache_path):
+    responses = ResponseCache(cache_path, max_entries=3)
+    for day in range(1, 4):
+        responses.put(10.0, 20.0, f"2024-01-0{day}", RESULTS)
+
+    # Touch the oldest row so the second one becomes least recently used.
+    time.sleep(0.01)
+    assert responses.get(10.0, 20.0, "2024-01-01") == RESULTS
+    responses.put(10.0, 20.0, "2024-01-04", RESULTS)
+
+    assert responses.stats()["entries"] == 3
+    assert responses.get(10.0, 20.0, "2024-01-02") is None
+    for day in (1, 3, 4):
+        assert responses.get(10.0, 20.0, f"2024-01-0{day}") == RESULTS
+
+
+def test_expired_entry_is_a_miss(sunrise_sunset, api, cache_path, monkeypatch):
+    responses = ResponseCache(cache_path, ttl=60)
+    sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=responses)
+
+    later = time.time() + 61
+    monkeypatch.setattr(cache.time, "time", lambda: later)
+    sunrise_sunset.SunInfo(36.72016, -4.42034, "2024-03-20", cache=responses)
+
+    assert api.requests == 2
+    assert responses.hits == 0
+    assert responses.misses == 2
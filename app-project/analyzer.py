@@ -1,42 +1,573 @@
+import argparse
 import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
 import numpy as np
 
+DATA_FILE = "covid19cases_test.csv"
+COLUMNS_TO_LOAD = [0, 1, 10]  # date, area, positive_tests
+ALL_YEARS = "all"
+ALL_PLACES = "*"
+COLUMN_FILES = ("dates", "area_codes", "area_names", "positive_tests")
+RESAMPLE_FREQUENCIES = ("daily", "weekly", "monthly")
+ROLLING_STATS = ("mean", "max")
+STREAM_CHUNK_ROWS = 1000
 
-def analyze(place: str, year: str) -> np.ndarray:
-    file_path = os.path.join(os.getcwd(), "covid19cases_test.csv")
-    columns_to_load = [0, 1, 10]  # date, area, positive_tests
+Summary = Dict[str, float]
 
-    try:
+
+class CovidDataset:
+    """
+    Columnar, indexed snapshot of the COVID CSV.
+
+    Rows are sorted by (area, date), areas are stored as integer codes and
+    dates as datetime64, so every (area, year) pair maps to one contiguous
+    row range and a lookup never scans the whole dataset.
+
+    Count, sum, min, max and mean for every (area, year) and (area, "all")
+    pair are precomputed in ``stats``; a new snapshot is built whenever the
+    CSV changes, which invalidates them.
+    """
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        area_codes: np.ndarray,
+        area_names: np.ndarray,
+        positive_tests: np.ndarray,
+        mtime: Optional[int] = None,
+    ) -> None:
+        # Columns must already be sorted by (area code, date).
+        self.dates = dates
+        self.area_codes = area_codes
+        self.area_names = area_names
+        self.positive_tests = positive_tests
+        self.mtime = mtime
+
+        years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        self.years = np.where(np.isnat(dates), 0, years).astype(np.int32)
+
+        self.area_lookup: Dict[str, int] = {
+            str(name).lower(): code for code, name in enumerate(area_names)
+        }
+        uniq, starts, stops = self._group_ranges(
+            area_codes.astype(np.int64) * 10_000 + self.years
+        )
+        self.index: Dict[Tuple[int, int], Tuple[int, int]] = {
+            divmod(int(key), 10_000): (int(start), int(stop))
+            for key, start, stop in zip(uniq, starts, stops)
+        }
+
+        self.stats: Dict[Tuple[int, Union[int, str]], Summary] = {
+            divmod(int(key), 10_000): summary
+            for key, summary in zip(uniq, self._aggregate(starts, stops))
+        }
+
+        uniq, starts, stops = self._group_ranges(area_codes)
+        self.area_index: Dict[int, Tuple[int, int]] = {
+            int(code): (int(start), int(stop))
+            for code, start, stop in zip(uniq, starts, stops)
+        }
+        self.stats.update(
+            ((int(code), ALL_YEARS), summary)
+            for code, summary in zip(uniq, self._aggregate(starts, stops))
+        )
+
+    @staticmethod
+    def _group_ranges(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return each distinct key with the (start, stop) of its contiguous run, in row order."""
+        uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        order = np.argsort(starts)
+        return uniq[order], starts[order], (starts + counts)[order]
+
+    def _aggregate(self, starts: np.ndarray, stops: np.ndarray) -> list:
+        """Reduce every contiguous row range to its summary in one pass."""
+        if starts.size == 0:
+            return []
+
+        values = self.positive_tests.astype(float)
+        counts = stops - starts
+        totals = np.add.reduceat(values, starts)
+        maxima = np.maximum.reduceat(values, starts)
+        minima = np.minimum.reduceat(values, starts)
+        means = totals / counts
+
+        return [
+            {
+                "count": int(count),
+                "total_cases": float(total),
+                "average_cases": float(mean),
+                "max_cases": float(maximum),
+                "min_cases": float(minimum),
+            }
+            for count, total, mean, maximum, minimum
+            in zip(counts, totals, means, maxima, minima)
+        ]
+
+    @classmethod
+    def from_csv(cls, file_path: str, mtime: Optional[int] = None) -> "CovidDataset":
+        """Parse the CSV once and build the sorted, encoded columns."""
         data = np.genfromtxt(
             file_path,
             delimiter=",",
             skip_header=1,
-            usecols=columns_to_load,
+            usecols=COLUMNS_TO_LOAD,
             dtype=None,
             encoding="utf-8"
         )
-    except OSError:
-        print(f"[ERROR] File not found: {file_path}")
-        return np.array([])
+        data = np.atleast_1d(data)
 
-    if data.size == 0:
-        return np.array([])
+        if data.size == 0:
+            return cls(
+                np.array([], dtype="datetime64[D]"),
+                np.array([], dtype=np.int32),
+                np.array([], dtype=str),
+                np.array([], dtype=float),
+                mtime,
+            )
+
+        dates = data["f0"].astype(str).astype("datetime64[D]")
+        areas = data["f1"].astype(str)
+        positive_tests = data["f2"].astype(float)
+
+        _, first_seen, area_codes = np.unique(
+            np.char.lower(areas), return_index=True, return_inverse=True
+        )
+        area_codes = area_codes.astype(np.int32)
+        order = np.lexsort((dates, area_codes))
+
+        return cls(
+            dates[order],
+            area_codes[order],
+            areas[first_seen],
+            positive_tests[order],
+            mtime,
+        )
+
+    @classmethod
+    def from_columns(cls, cache_dir: str, mtime: Optional[int] = None) -> "CovidDataset":
+        """Memory-map the sorted columns written by build_column_cache()."""
+        columns = {
+            name: np.load(
+                os.path.join(cache_dir, f"{name}.npy"),
+                mmap_mode=None if name == "area_names" else "r",
+            )
+            for name in COLUMN_FILES
+        }
+        return cls(
+            columns["dates"],
+            columns["area_codes"],
+            columns["area_names"],
+            columns["positive_tests"],
+            mtime,
+        )
+
+    def select(self, place: str, year: str) -> Optional[Union[slice, np.ndarray]]:
+        """Return the rows matching place/year, or None if nothing matches."""
+        code = self.area_lookup.get(place.lower())
+        if code is None:
+            return None
 
-    place_mask = np.char.lower(data["f1"].astype(str)) == place.lower()
+        start, stop = self.area_index[code]
 
-    if year.lower() == "all":
-        final_mask = place_mask
+        if year.lower() == ALL_YEARS:
+            return slice(start, stop)
+
+        if len(year) == 4 and year.isdigit():
+            bounds = self.index.get((code, int(year)))
+            return slice(*bounds) if bounds else None
+
+        # Any other filter keeps the old substring match on the date,
+        # but only over this area's rows.
+        dates = np.datetime_as_string(self.dates[start:stop])
+        hits = np.flatnonzero(np.char.find(dates, year) >= 0)
+        return hits + start if hits.size else None
+
+    def expand(self, queries: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Replace place "*" with every area that has rows for the year."""
+        expanded = []
+        for place, year in queries:
+            if place != ALL_PLACES:
+                expanded.append((place, year))
+                continue
+
+            for name in self.area_names:
+                if self.select(str(name), year) is not None:
+                    expanded.append((str(name), year))
+        return expanded
+
+    @staticmethod
+    def _window(
+        rows: Union[slice, np.ndarray], offset: int, limit: Optional[int]
+    ) -> Union[slice, np.ndarray]:
+        """Narrow a selection to its [offset, offset + limit) part without copying row data."""
+        if isinstance(rows, slice):
+            start = min(rows.start + offset, rows.stop)
+            stop = rows.stop if limit is None else min(rows.stop, start + limit)
+            return slice(start, stop)
+        return rows[offset:] if limit is None else rows[offset:offset + limit]
+
+    def page(
+        self, place: str, year: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Return (dates, values, total matches) for rows [offset, offset + limit) of place/year."""
+        rows = self.select(place, year)
+        if rows is None:
+            return np.array([], dtype="datetime64[D]"), np.array([]), 0
+
+        total = rows.stop - rows.start if isinstance(rows, slice) else rows.size
+        rows = self._window(rows, offset, limit)
+        return self.dates[rows], self.positive_tests[rows].astype(float), total
+
+    def iter_pages(
+        self,
+        place: str,
+        year: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_ROWS,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (dates, values) chunks of at most chunk_size rows."""
+        rows = self.select(place, year)
+        if rows is None:
+            return
+
+        rows = self._window(rows, offset, limit)
+        count = rows.stop - rows.start if isinstance(rows, slice) else rows.size
+
+        for begin in range(0, count, chunk_size):
+            chunk = self._window(rows, begin, chunk_size)
+            yield self.dates[chunk], self.positive_tests[chunk].astype(float)
+
+    def series(
+        self,
+        place: str,
+        year: str = ALL_YEARS,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (dates, values) for place/year, clipped to the inclusive start/end dates."""
+        rows = self.select(place, year)
+        if rows is None:
+            return np.array([], dtype="datetime64[D]"), np.array([])
+
+        dates = self.dates[rows]
+        values = self.positive_tests[rows]
+
+        # Rows of one area are sorted by date, so the range is two binary searches.
+        lo = np.searchsorted(dates, np.datetime64(start, "D"), "left") if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), "right") if end else dates.size
+
+        return dates[lo:hi], values[lo:hi].astype(float)
+
+    def summary(self, place: str, year: str) -> Optional[Summary]:
+        """Return the precomputed summary for place/year, computing it only for ad-hoc filters."""
+        code = self.area_lookup.get(place.lower())
+        if code is None:
+            return None
+
+        if year.lower() == ALL_YEARS:
+            return self.stats.get((code, ALL_YEARS))
+
+        if len(year) == 4 and year.isdigit():
+            return self.stats.get((code, int(year)))
+
+        rows = self.select(place, year)
+        if rows is None:
+            return None
+
+        values = self.positive_tests[rows].astype(float)
+        return {
+            "count": int(values.size),
+            "total_cases": float(values.sum()),
+            "average_cases": float(values.mean()),
+            "max_cases": float(values.max()),
+            "min_cases": float(values.min()),
+        }
+
+
+def _run_sums(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Sum each run values[starts[i]:starts[i + 1]] via one cumulative sum."""
+    totals = np.concatenate(([0.0], np.cumsum(values)))
+    stops = np.append(starts[1:], values.size)
+    return totals[stops] - totals[starts]
+
+
+def resample(
+    dates: np.ndarray, values: np.ndarray, frequency: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum date-sorted values into daily, weekly (Monday-start) or monthly
+    buckets. Rows without a date are dropped and missing values count as 0.
+    """
+    if frequency not in RESAMPLE_FREQUENCIES:
+        raise ValueError(f"resample must be one of {', '.join(RESAMPLE_FREQUENCIES)}")
+
+    valid = ~np.isnat(dates)
+    dates, values = dates[valid], np.nan_to_num(values[valid])
+
+    if frequency == "weekly":
+        # Day 0 (1970-01-01) was a Thursday, so (day + 3) % 7 is days since Monday.
+        days = dates.astype(np.int64)
+        buckets = dates - ((days + 3) % 7).astype("timedelta64[D]")
+    elif frequency == "monthly":
+        buckets = dates.astype("datetime64[M]").astype("datetime64[D]")
     else:
-        year_mask = np.char.find(data["f0"].astype(str), year) >= 0
-        final_mask = place_mask & year_mask
+        buckets = dates
 
-    filtered = data[final_mask]
+    if buckets.size == 0:
+        return buckets, values
 
-    if filtered.size == 0:
-        return np.array([])
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    return buckets[starts], _run_sums(values, starts)
+
+
+def rolling(
+    dates: np.ndarray, values: np.ndarray, window: int, stat: str = "mean"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing rolling mean or max over `window` consecutive values, labelled
+    with the date that closes each window. Missing values count as 0.
+    """
+    if stat not in ROLLING_STATS:
+        raise ValueError(f"stat must be one of {', '.join(ROLLING_STATS)}")
+    if window < 1:
+        raise ValueError("window must be a positive integer")
+
+    values = np.nan_to_num(values)
+    if values.size < window:
+        return dates[:0], values[:0]
+
+    if stat == "mean":
+        totals = np.concatenate(([0.0], np.cumsum(values)))
+        result = (totals[window:] - totals[:-window]) / window
+    else:
+        result = np.lib.stride_tricks.sliding_window_view(values, window).max(axis=1)
+
+    return dates[window - 1:], result
+
+
+def column_cache_path(file_path: str) -> str:
+    """Return the binary sidecar directory that sits next to the CSV."""
+    return os.path.splitext(file_path)[0] + ".columns"
+
+
+def build_column_cache(file_path: Optional[str] = None) -> str:
+    """
+    Convert the CSV into a sidecar of .npy columns: datetime64 dates,
+    dictionary-encoded int32 areas and float32 counts, already sorted by
+    (area, date). Workers memory-map these files and share their pages.
+    """
+    if file_path is None:
+        file_path = os.path.join(os.getcwd(), DATA_FILE)
+
+    dataset = CovidDataset.from_csv(file_path)
+    cache_dir = column_cache_path(file_path)
+    columns = {
+        "dates": dataset.dates.astype("datetime64[D]"),
+        "area_codes": dataset.area_codes.astype(np.int32),
+        "area_names": dataset.area_names.astype(str),
+        "positive_tests": dataset.positive_tests.astype(np.float32),
+    }
+
+    # Write into a fresh directory and swap it in, so readers never see a
+    # half-written set of columns.
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    staging = tempfile.mkdtemp(prefix=".columns-", dir=parent)
+    os.chmod(staging, 0o755)
+    for name, column in columns.items():
+        np.save(os.path.join(staging, f"{name}.npy"), column)
+
+    if os.path.isdir(cache_dir):
+        retired = tempfile.mkdtemp(prefix=".columns-old-", dir=parent)
+        os.replace(cache_dir, os.path.join(retired, "columns"))
+        os.replace(staging, cache_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staging, cache_dir)
+
+    return cache_dir
+
+
+def load_dataset(file_path: str, mtime: Optional[int] = None) -> CovidDataset:
+    """Use the binary sidecar when it is newer than the CSV, else parse the CSV."""
+    cache_dir = column_cache_path(file_path)
+
+    try:
+        fresh = os.stat(cache_dir).st_mtime_ns >= os.stat(file_path).st_mtime_ns
+    except OSError:
+        fresh = False
+
+    if fresh:
+        try:
+            return CovidDataset.from_columns(cache_dir, mtime)
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] Ignoring unreadable column cache {cache_dir}: {exc}")
+
+    return CovidDataset.from_csv(file_path, mtime)
+
+
+_datasets: Dict[str, CovidDataset] = {}
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(file_path: Optional[str] = None) -> CovidDataset:
+    """
+    Return the process-wide dataset for file_path, reloading it when the
+    file's modification time changes.
+    """
+    if file_path is None:
+        file_path = os.path.join(os.getcwd(), DATA_FILE)
+
+    mtime = os.stat(file_path).st_mtime_ns
+    dataset = _datasets.get(file_path)
+
+    if dataset is None or dataset.mtime != mtime:
+        with _datasets_lock:
+            dataset = _datasets.get(file_path)
+            if dataset is None or dataset.mtime != mtime:
+                dataset = load_dataset(file_path, mtime)
+                _datasets[file_path] = dataset
+
+    return dataset
+
+
+def current_dataset() -> Optional[CovidDataset]:
+    """Return the current dataset, reporting load errors like the CLI always has."""
+    file_path = os.path.join(os.getcwd(), DATA_FILE)
 
     try:
-        return filtered["f2"].astype(float)
+        return get_dataset(file_path)
+    except OSError:
+        print(f"[ERROR] File not found: {file_path}")
     except ValueError:
         print("[ERROR] Cannot convert positive test counts to float.")
+    return None
+
+
+def analyze(place: str, year: str) -> np.ndarray:
+    dataset = current_dataset()
+    if dataset is None:
+        return np.array([])
+
+    rows = dataset.select(place, year)
+
+    if rows is None:
         return np.array([])
+
+    return dataset.positive_tests[rows].astype(float)
+
+
+def summarize(place: str, year: str) -> Optional[Summary]:
+    """Return count/total/average/max/min for place/year without the per-row values."""
+    dataset = current_dataset()
+    if dataset is None:
+        return None
+
+    return dataset.summary(place, year)
+
+
+def iter_rows(
+    place: str,
+    year: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (dates, values) chunks of at most chunk_size rows for place/year,
+    starting at offset. Only one chunk is materialised at a time, so memory
+    stays bounded however many rows match.
+    """
+    dataset = current_dataset()
+    if dataset is None:
+        return iter(())
+
+    return dataset.iter_pages(place, year, offset, limit, chunk_size)
+
+
+def page(
+    place: str, year: str, offset: int = 0, limit: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Return one page of (dates, values) plus the total number of matching rows."""
+    dataset = current_dataset()
+    if dataset is None:
+        return np.array([], dtype="datetime64[D]"), np.array([]), 0
+
+    return dataset.page(place, year, offset, limit)
+
+
+def analyze_series(
+    place: str,
+    year: str = ALL_YEARS,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    frequency: Optional[str] = None,
+    window: Optional[int] = None,
+    stat: str = "mean",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (dates, values) for place/year between start and end, optionally
+    resampled to daily/weekly/monthly sums and then smoothed with a rolling
+    window. Raises ValueError for malformed dates or options.
+    """
+    dataset = current_dataset()
+    if dataset is None:
+        return np.array([], dtype="datetime64[D]"), np.array([])
+
+    dates, values = dataset.series(place, year, start, end)
+
+    if frequency:
+        dates, values = resample(dates, values, frequency)
+    if window is not None:
+        dates, values = rolling(dates, values, window, stat)
+
+    return dates, values
+
+
+def analyze_many(
+    queries: Iterable[Tuple[str, str]], summary_only: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Answer many (place, year) pairs against one dataset snapshot.
+
+    Summaries come from the aggregate table built in a single grouped pass,
+    and per-row values are contiguous slices of the sorted columns, so the
+    cost is independent of how many pairs are asked for. A place of "*"
+    expands to every area with data for that year.
+    """
+    dataset = current_dataset()
+    if dataset is None:
+        return []
+
+    results = []
+    for place, year in dataset.expand(queries):
+        summary = dataset.summary(place, year)
+
+        if summary is None:
+            results.append({"place": place, "year": year, "message": "No data found"})
+            continue
+
+        result: Dict[str, Any] = {"place": place, "year": year}
+        if not summary_only:
+            result["positive_counts"] = dataset.positive_tests[dataset.select(place, year)].astype(float)
+        result.update(summary)
+        results.append(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the memory-mapped column cache next to the COVID CSV."
+    )
+    parser.add_argument(
+        "csv_path", nargs="?", default=os.path.join(os.getcwd(), DATA_FILE),
+        help="CSV file to convert"
+    )
+    args = parser.parse_args()
+
+    print(f"Column cache written to {build_column_cache(args.csv_path)}")
@@ -1,8 +1,43 @@
-from flask import Flask, request, jsonify, abort
-from analyzer import analyze
+import json
+import os
+
+import numpy as np
+from flask import Flask, Response, request, jsonify, abort
+from analyzer import (
+    analyze, analyze_many, analyze_series, current_dataset, get_dataset,
+    iter_rows, page, summarize
+)
+import metrics
+from metrics import timed
 
 app = Flask(__name__)
 
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10_000
+
+# Parse the CSV once per process; later requests are answered from the index.
+try:
+    get_dataset()
+except (OSError, ValueError) as exc:
+    print(f"[WARN] Dataset not preloaded: {exc}")
+
+
+def date_strings(dates: np.ndarray) -> list:
+    """Render datetime64 dates as YYYY-MM-DD strings, with None for missing dates."""
+    return [None if d == "NaT" else d for d in np.datetime_as_string(dates).tolist()]
+
+
+def as_bool(value) -> bool:
+    """Interpret query-string or JSON flags such as summary_only=1/true."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+# Per-request phase timing (Server-Timing headers and /metrics) is opt-in.
+if as_bool(os.environ.get("ANALYZER_TIMING", "")):
+    metrics.init_app(app)
+
 
 @app.route("/analyze", methods=["GET", "POST"])
 def analyze_route():
@@ -10,26 +45,52 @@ def analyze_route():
     API Endpoint:
         /analyze
     Methods:
-        GET  - /analyze?place=San Francisco&year=2020
-        POST - JSON { "place": "...", "year": "..." }
+        GET  - /analyze?place=San Francisco&year=2020[&summary_only=1]
+        POST - JSON { "place": "...", "year": "...", "summary_only": false }
+
+    Optional row paging (positive_counts come with their dates):
+        cursor - row offset to start from; the response carries next_cursor
+        limit  - page size, at most MAX_PAGE_SIZE
+        format - 'ndjson' streams every row as {"date", "positive_tests"} lines
+
+    Optional time-series parameters (return dates/values instead of totals):
+        start, end - inclusive YYYY-MM-DD bounds; 'year' defaults to 'all'
+        resample   - daily | weekly | monthly sums
+        window     - rolling window length, applied after resampling
+        stat       - rolling statistic: mean (default) | max
     """
     # ---------------------------
     # Parse GET parameters
     # ---------------------------
     if request.method == "GET":
-        place = request.args.get("place")
-        year = request.args.get("year")
+        params = request.args
 
     # ---------------------------
     # Parse POST JSON body
     # ---------------------------
     elif request.method == "POST":
-        data = request.get_json(silent=True)
-        if not data:
+        params = request.get_json(silent=True)
+        if not params:
             return jsonify({"error": "Invalid JSON"}), 400
+        if not isinstance(params, dict):
+            return jsonify({"error": "JSON body must be an object."}), 400
 
-        place = data.get("place")
-        year = data.get("year")
+    place = params.get("place")
+    year = params.get("year")
+    summary_only = as_bool(params.get("summary_only", False))
+
+    start = params.get("start")
+    end = params.get("end")
+    frequency = params.get("resample")
+    window = params.get("window")
+    stat = params.get("stat", "mean")
+
+    cursor = params.get("cursor")
+    limit = params.get("limit")
+    output_format = params.get("format", "json")
+
+    if (start or end) and not year:
+        year = "all"
 
     # ---------------------------
     # Validate parameters
@@ -39,30 +100,165 @@ def analyze_route():
             "error": "Both 'place' and 'year' are required."
         }), 400
 
+    # JSON bodies can carry any type; text parameters must be strings
+    # (the year may also be a number).
+    if not isinstance(place, str):
+        return jsonify({"error": "'place' must be a string."}), 400
+    if isinstance(year, bool) or not isinstance(year, (str, int)):
+        return jsonify({"error": "'year' must be a string or an integer."}), 400
+    for name, value in (("start", start), ("end", end), ("resample", frequency),
+                        ("stat", stat), ("format", output_format)):
+        if value is not None and not isinstance(value, str):
+            return jsonify({"error": f"'{name}' must be a string."}), 400
+
+    year = str(year)
+
+    with timed("load"):
+        current_dataset()
+
+    # ---------------------------
+    # Time-series windowing
+    # ---------------------------
+    if start or end or frequency or window is not None:
+        try:
+            window_size = None if window is None else int(window)
+        except (TypeError, ValueError):
+            return jsonify({"error": "'window' must be an integer."}), 400
+
+        try:
+            with timed("aggregate"):
+                dates, values = analyze_series(
+                    place, year, start, end, frequency, window_size, stat
+                )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        if values.size == 0:
+            return jsonify({
+                "place": place,
+                "year": year,
+                "message": "No data found"
+            }), 404
+
+        with timed("serialize"):
+            return jsonify({
+                "place": place,
+                "year": year,
+                "start": start,
+                "end": end,
+                "resample": frequency,
+                "window": window_size,
+                "stat": stat if window_size is not None else None,
+                "dates": date_strings(dates),
+                "values": values.tolist()
+            })
+
     # ---------------------------
-    # Analyze data
+    # Look up precomputed totals
     # ---------------------------
-    result_array = analyze(place, year)
+    with timed("aggregate"):
+        summary = summarize(place, year)
 
-    if result_array.size == 0:
+    if summary is None:
         return jsonify({
             "place": place,
             "year": year,
             "message": "No data found"
         }), 404
 
+    # ---------------------------
+    # Stream or page through rows
+    # ---------------------------
+    try:
+        offset = max(int(cursor or 0), 0)
+        limit = None if limit is None else min(max(int(limit), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'cursor' and 'limit' must be integers."}), 400
+
+    if output_format == "ndjson":
+        def generate():
+            for dates, values in iter_rows(place, year, offset, limit):
+                yield "".join(
+                    json.dumps({"date": date, "positive_tests": value}) + "\n"
+                    for date, value in zip(date_strings(dates), values.tolist())
+                )
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    if cursor is not None or limit is not None:
+        limit = limit or DEFAULT_PAGE_SIZE
+        with timed("filter"):
+            dates, values, total = page(place, year, offset, limit)
+        next_cursor = offset + values.size
+
+        with timed("serialize"):
+            response = {
+                "place": place,
+                "year": year,
+                "cursor": offset,
+                "next_cursor": next_cursor if next_cursor < total else None,
+                "total_rows": total,
+                "dates": date_strings(dates),
+                "positive_counts": values.tolist()
+            }
+            response.update(summary)
+            return jsonify(response)
+
     # ---------------------------
     # Return numeric results
     # ---------------------------
-    return jsonify({
-        "place": place,
-        "year": year,
-        "positive_counts": result_array.tolist(),
-        "total_cases": float(result_array.sum()),
-        "average_cases": float(result_array.mean()),
-        "max_cases": float(result_array.max()),
-        "min_cases": float(result_array.min())
-    })
+    response = {"place": place, "year": year}
+
+    if not summary_only:
+        with timed("filter"):
+            positive_counts = analyze(place, year)
+        with timed("serialize"):
+            response["positive_counts"] = positive_counts.tolist()
+
+    response.update(summary)
+    with timed("serialize"):
+        return jsonify(response)
+
+
+@app.route("/analyze/batch", methods=["POST"])
+def analyze_batch_route():
+    """
+    API Endpoint:
+        /analyze/batch
+    Methods:
+        POST - JSON {
+                   "queries": [{ "place": "...", "year": "..." }, { "place": "*", "year": "2021" }],
+                   "summary_only": false
+               }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "'queries' must be a non-empty list."}), 400
+
+    pairs = []
+    for query in queries:
+        if not isinstance(query, dict) or not query.get("place") or not query.get("year"):
+            return jsonify({
+                "error": "Every query needs both 'place' and 'year'."
+            }), 400
+        pairs.append((str(query["place"]), str(query["year"])))
+
+    with timed("load"):
+        current_dataset()
+
+    with timed("aggregate"):
+        results = analyze_many(pairs, as_bool(data.get("summary_only", False)))
+
+    with timed("serialize"):
+        for result in results:
+            if "positive_counts" in result:
+                result["positive_counts"] = result["positive_counts"].tolist()
+
+        return jsonify({"results": results})
 
 
 if __name__ == "__main__":
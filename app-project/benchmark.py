@@ -0,0 +1,152 @@
+"""
+Load-test the /analyze API on synthetic COVID CSVs of increasing size.
+
+Example:
+    python benchmark.py --rows 10000 100000 1000000 --requests 500
+    python benchmark.py --column-cache --json report.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+import analyzer
+
+HEADER = (
+    "date,area,area_type,population,cases,cumulative_cases,deaths,"
+    "cumulative_deaths,total_tests,cumulative_total_tests,positive_tests,"
+    "cumulative_positive_tests"
+)
+AREAS = [
+    "Alameda", "Contra Costa", "Fresno", "Kern", "Los Angeles", "Marin",
+    "Orange", "Riverside", "Sacramento", "San Bernardino", "San Diego",
+    "San Francisco", "San Mateo", "Santa Clara", "Sonoma", "Ventura",
+    "California", "Out of state", "Unknown",
+]
+START_DATE = date(2020, 2, 1)
+
+
+def generate_csv(file_path: str, rows: int, seed: int = 0) -> None:
+    """Write a CSV shaped like covid19cases_test.csv with about `rows` rows."""
+    rng = random.Random(seed)
+    days = -(-rows // len(AREAS))
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        written = 0
+        for day in range(days):
+            day_str = (START_DATE + timedelta(days=day)).isoformat()
+            for area in AREAS:
+                if written == rows:
+                    return
+                tests = rng.randint(0, 50_000)
+                positives = rng.randint(0, tests // 10 + 1)
+                f.write(
+                    f"{day_str},{area},County,100000,{positives // 2},0,0,0,"
+                    f"{tests},0,{positives},0\n"
+                )
+                written += 1
+
+
+def run_size(client, rows: int, requests: int, column_cache: bool, seed: int) -> Dict:
+    """Generate one dataset, then time a cold request and `requests` warm ones."""
+    workdir = tempfile.mkdtemp(prefix="analyzer-bench-")
+    os.chdir(workdir)
+    try:
+        return _time_requests(client, rows, requests, column_cache, seed)
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _time_requests(client, rows: int, requests: int, column_cache: bool, seed: int) -> Dict:
+    generate_csv(analyzer.DATA_FILE, rows, seed)
+    if column_cache:
+        analyzer.build_column_cache()
+
+    last_year = START_DATE.year + (-(-rows // len(AREAS))) // 365
+    years = [str(y) for y in range(START_DATE.year, last_year + 1)] + ["all"]
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    client.get("/analyze", query_string={"place": "San Francisco", "year": "all"})
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    latencies: List[float] = []
+    wall_start = time.perf_counter()
+    for _ in range(requests):
+        query = {"place": rng.choice(AREAS), "year": rng.choice(years)}
+        if rng.random() < 0.5:
+            query["summary_only"] = "1"
+
+        start = time.perf_counter()
+        response = client.get("/analyze", query_string=query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code not in (200, 404):
+            raise RuntimeError(f"{query} -> HTTP {response.status_code}")
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "rows": rows,
+        "column_cache": column_cache,
+        "cold_ms": round(cold_ms, 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "requests_per_sec": round(requests / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /analyze on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Dataset sizes to generate, in rows")
+    parser.add_argument("--requests", type=int, default=500, help="Warm requests per size")
+    parser.add_argument("--column-cache", action="store_true",
+                        help="Build the binary column cache before the cold request")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and queries")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report_path = os.path.abspath(args.json) if args.json else None
+
+    # The app preloads the CSV in the working directory at import time; import
+    # it from an empty directory (expect a "not preloaded" warning) so every
+    # size's cold request pays its own load.
+    os.environ.setdefault("ANALYZER_TIMING", "1")
+    empty_dir = tempfile.mkdtemp(prefix="analyzer-bench-")
+    os.chdir(empty_dir)
+    from app import app
+    os.rmdir(empty_dir)
+    client = app.test_client()
+
+    print(f"{'Rows':>10}{'Cold (ms)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Req/s':>10}")
+    print("-" * 56)
+
+    results = []
+    for rows in args.rows:
+        result = run_size(client, rows, args.requests, args.column_cache, args.seed)
+        results.append(result)
+        print(f"{result['rows']:>10}{result['cold_ms']:>12.2f}{result['p50_ms']:>12.3f}"
+              f"{result['p99_ms']:>12.3f}{result['requests_per_sec']:>10.1f}")
+
+    phases = client.get("/metrics").get_json(silent=True)
+    if phases:
+        print("\nPhase latency across all runs (bucket upper bounds):")
+        for phase, histogram in phases.get("analyze_route", {}).items():
+            print(f"  {phase:<10} mean {histogram['mean_ms']:>9.3f} ms   "
+                  f"p50 <= {histogram['p50_ms']} ms   p99 <= {histogram['p99_ms']} ms")
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "phases": phases}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
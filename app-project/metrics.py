@@ -0,0 +1,129 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from flask import Flask, g, jsonify, request
+
+# Upper bounds (milliseconds) of the latency histogram buckets.
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; the last bucket collects everything slower."""
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+class RequestMetrics:
+    """Per-endpoint, per-phase latency histograms shared by every request thread."""
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, phase: str, ms: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((endpoint, phase))
+            if histogram is None:
+                histogram = self.histograms[(endpoint, phase)] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result: Dict[str, dict] = {}
+            for (endpoint, phase), histogram in sorted(self.histograms.items()):
+                result.setdefault(endpoint, {})[phase] = histogram.to_dict()
+            return result
+
+
+metrics = RequestMetrics()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time a block as one phase of the current request; a no-op when timing is off."""
+    timings = g.get("timings")
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def _start_timer() -> None:
+    g.timings = {}
+    g.request_start = time.perf_counter()
+
+
+def _record_timings(response):
+    timings = g.get("timings")
+    if timings is None or request.endpoint == "metrics_route":
+        return response
+
+    total = (time.perf_counter() - g.request_start) * 1000
+    endpoint = request.endpoint or "unknown"
+
+    for phase, ms in timings.items():
+        metrics.observe(endpoint, phase, ms)
+    metrics.observe(endpoint, "total", total)
+
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{phase};dur={ms:.3f}" for phase, ms in timings.items()]
+        + [f"total;dur={total:.3f}"]
+    )
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Enable per-request phase timing, Server-Timing headers and /metrics."""
+    app.before_request(_start_timer)
+    app.after_request(_record_timings)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_route():
+        """
+        API Endpoint:
+            /metrics
+        Methods:
+            GET - latency histograms per endpoint and phase, in milliseconds
+        """
+        return jsonify(metrics.snapshot())
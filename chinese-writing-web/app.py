@@ -1,66 +1,65 @@
-from flask import Flask, render_template, request
+import hashlib
+import json
+from functools import lru_cache
 
-app = Flask(__name__)
-
-dictionary = {}
-
-
-# Convert numbered pinyin (ni3 hao3) → tone marks (nǐ hǎo)
-def convert_pinyin(pinyin):
-
-    tone_map = {
-        'a': ['ā','á','ǎ','à'],
-        'e': ['ē','é','ě','è'],
-        'i': ['ī','í','ǐ','ì'],
-        'o': ['ō','ó','ǒ','ò'],
-        'u': ['ū','ú','ǔ','ù'],
-        'v': ['ǖ','ǘ','ǚ','ǜ']
-    }
+from flask import Flask, Response, jsonify, render_template, request
 
-    for i in range(1,5):
+from cedict_index import open_index
+from stroke_data import open_strokes
 
-        if str(i) in pinyin:
-
-            tone = i - 1
-            pinyin = pinyin.replace(str(i), '')
-
-            for v in "aeiouv":
-
-                if v in pinyin:
-                    pinyin = pinyin.replace(v, tone_map[v][tone], 1)
-                    return pinyin
+app = Flask(__name__)
 
-    return pinyin
+# Load CEDICT from the compiled, memory-mapped index (built on first run)
+dictionary = open_index("data/cedict.txt", "data/cedict.idx")
 
+# HanziWriter stroke data packed by stroke_data.py; the page falls back to
+# the CDN for characters it cannot serve
+strokes = open_strokes("data/strokes.idx")
 
-# Load CEDICT dictionary
-with open("data/cedict.txt", encoding="utf-8") as f:
+if strokes is None:
+    print("[WARN] data/strokes.idx not found; stroke data will come from the CDN")
 
-    for line in f:
+# Search modes offered next to the plain character lookup
+SEARCH_MODES = {
+    "prefix": dictionary.prefix,
+    "english": dictionary.search_english,
+    "pinyin": dictionary.search_pinyin,
+}
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
 
-        if line.startswith("#"):
-            continue
+# Largest paragraph accepted by the segmenter, in characters
+MAX_SEGMENT_CHARS = 200_000
 
-        parts = line.split(" ")
+# Batch lookups: words per request and serialized responses kept in memory
+MAX_LOOKUP_WORDS = 200
+LOOKUP_CACHE_SIZE = 4096
 
-        if len(parts) > 2:
+# Responses are revalidated daily, or cached for good when the URL pins ?v=<version>
+LOOKUP_MAX_AGE = 86400
+IMMUTABLE = "public, max-age=31536000, immutable"
 
-            char = parts[1]
+# Characters per /strokes batch request
+MAX_STROKE_CHARS = 64
 
-            try:
 
-                pinyin = line.split("[")[1].split("]")[0]
+def search(mode, query, limit=DEFAULT_LIMIT):
+    """Run one dictionary query; mode "word" returns every reading of query."""
+    if mode == "word":
+        return dictionary.lookup(query)
+    return SEARCH_MODES[mode](query, limit)
 
-                meanings = line.split("/")[1:-1]
-                meaning = ", ".join(meanings)
 
-                dictionary[char] = {
-                    "pinyin": convert_pinyin(pinyin),
-                    "meaning": meaning
-                }
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def lookup_response(words):
+    """Serialized /api/lookup body and its strong ETag for a tuple of words."""
+    body = json.dumps({
+        "version": dictionary.version,
+        "results": {word: dictionary.lookup(word) for word in words}
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
-            except:
-                continue
+    key = "\0".join((dictionary.version,) + words).encode("utf-8")
+    return body, hashlib.sha1(key).hexdigest()
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -69,10 +68,20 @@ def index():
     character = ""
     pinyin = ""
     meaning = ""
+    results = []
 
-    if request.method == "POST":
+    # Form posts and result links (?character=...&mode=...) share the same fields
+    query = request.values.get("character", "").strip()
+    mode = request.values.get("mode", "word")
+
+    if query and mode in SEARCH_MODES:
+
+        results = search(mode, query)
 
-        character = request.form["character"]
+    elif query:
+
+        mode = "word"
+        character = query
 
         if character in dictionary:
 
@@ -83,10 +92,165 @@ def index():
         "index.html",
         character=character,
         pinyin=pinyin,
-        meaning=meaning
+        meaning=meaning,
+        query=query,
+        mode=mode,
+        results=results,
+        version=dictionary.version
     )
 
 
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """
+    API Endpoint:
+        /api/search?q=<query>&mode=<word|prefix|english|pinyin>&limit=<n>
+    Methods:
+        GET - matching dictionary entries as JSON
+    """
+    query = request.args.get("q", "").strip()
+    mode = request.args.get("mode", "word")
+
+    if mode != "word" and mode not in SEARCH_MODES:
+        return jsonify({"error": f"Unknown mode '{mode}'"}), 400
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    results = search(mode, query, limit) if query else []
+
+    return jsonify({
+        "query": query,
+        "mode": mode,
+        "version": dictionary.version,
+        "results": results
+    })
+
+
+@app.route("/api/lookup", methods=["GET"])
+def api_lookup():
+    """
+    API Endpoint:
+        /api/lookup?q=<word>,<word>,...   (or repeated &q=)  [&v=<version>]
+    Methods:
+        GET - every reading of each word, keyed by word. Sends a strong ETag
+              (dictionary version + query) and answers If-None-Match with 304.
+    """
+    words = []
+    for value in request.args.getlist("q"):
+        for word in value.split(","):
+            word = word.strip()
+            if word and word not in words:
+                words.append(word)
+
+    if not words:
+        return jsonify({"error": "Missing 'q' parameter"}), 400
+    if len(words) > MAX_LOOKUP_WORDS:
+        return jsonify({"error": f"At most {MAX_LOOKUP_WORDS} words per request"}), 400
+
+    body, etag = lookup_response(tuple(words))
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    if request.args.get("v") == dictionary.version:
+        response.headers["Cache-Control"] = IMMUTABLE
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={LOOKUP_MAX_AGE}"
+    return response.make_conditional(request)
+
+
+def stroke_response(body, key):
+    """JSON response for stroke data, which never changes for a given archive."""
+    response = Response(body, mimetype="application/json")
+    response.set_etag(hashlib.sha1(f"{strokes.version}\0{key}".encode("utf-8")).hexdigest())
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response.make_conditional(request)
+
+
+@app.route("/strokes/<char>.json", methods=["GET"])
+def stroke_char(char):
+    """
+    API Endpoint:
+        /strokes/<character>.json
+    Methods:
+        GET - HanziWriter stroke data for one character
+    """
+    data = strokes.get(char) if strokes is not None else None
+
+    if data is None:
+        return jsonify({"error": f"No stroke data for '{char}'"}), 404
+
+    return stroke_response(data, char)
+
+
+@app.route("/strokes", methods=["GET"])
+def stroke_batch():
+    """
+    API Endpoint:
+        /strokes?chars=<characters>
+    Methods:
+        GET - stroke data for every character of a word in one response,
+              as {"<character>": {...} or null}
+    """
+    chars = request.args.get("chars", "")
+
+    if not chars:
+        return jsonify({"error": "Missing 'chars' parameter"}), 400
+    if len(chars) > MAX_STROKE_CHARS:
+        return jsonify({"error": f"At most {MAX_STROKE_CHARS} characters per request"}), 400
+    if strokes is None:
+        return jsonify({"error": "Stroke data is not installed"}), 404
+
+    return stroke_response(strokes.get_many(chars), chars)
+
+
+@app.route("/segment", methods=["GET", "POST"])
+def segment_page():
+
+    text = ""
+    tokens = []
+
+    if request.method == "POST":
+
+        text = request.form.get("text", "")[:MAX_SEGMENT_CHARS]
+        tokens = dictionary.annotate(text)
+
+    return render_template("segment.html", text=text, tokens=tokens)
+
+
+@app.route("/api/segment", methods=["POST"])
+def api_segment():
+    """
+    API Endpoint:
+        /api/segment
+    Methods:
+        POST - {"text": "..."} (or a form field / plain-text body); returns the
+               text split into dictionary words with pinyin and meaning
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if payload is None:
+            payload = {}
+        if not isinstance(payload, dict):
+            return jsonify({"error": "JSON body must be an object with a 'text' field"}), 400
+        text = payload.get("text", "")
+    else:
+        text = request.form.get("text") or request.get_data(as_text=True)
+
+    if not isinstance(text, str):
+        return jsonify({"error": "text must be a string"}), 400
+    if len(text) > MAX_SEGMENT_CHARS:
+        return jsonify({"error": f"text is longer than {MAX_SEGMENT_CHARS} characters"}), 413
+
+    return jsonify({
+        "version": dictionary.version,
+        "tokens": dictionary.annotate(text)
+    })
+
+
 # Only run locally (Render uses gunicorn)
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,90 @@
+"""
+Time sentence segmentation (/api/segment) on synthetic documents of
+increasing size, built from random dictionary headwords.
+
+Example:
+    python benchmark.py --chars 1000 10000 50000 100000 --repeat 5
+    python benchmark.py --json report.json
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from cedict_index import CedictIndex
+
+PUNCTUATION = "，。、！？ "
+
+
+def generate_text(dictionary: CedictIndex, chars: int, seed: int = 0) -> str:
+    """Random headwords separated by occasional punctuation, about `chars` long."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    while length < chars:
+        word = dictionary.headwords[rng.randrange(len(dictionary.headwords))].decode("utf-8")
+        if rng.random() < 0.15:
+            word += rng.choice(PUNCTUATION)
+        parts.append(word)
+        length += len(word)
+    return "".join(parts)[:chars]
+
+
+def run_size(client, dictionary: CedictIndex, chars: int, repeat: int, seed: int) -> Dict:
+    """Best-of-`repeat` timings for the segmenter alone and for the whole request."""
+    text = generate_text(dictionary, chars, seed)
+
+    segment_times = []
+    request_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = dictionary.annotate(text)
+        segment_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = client.post("/api/segment", json={"text": text})
+        request_times.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{chars} chars -> HTTP {response.status_code}")
+
+    best = min(segment_times)
+    return {
+        "chars": chars,
+        "tokens": len(tokens),
+        "segment_ms": round(best * 1000, 3),
+        "request_ms": round(min(request_times) * 1000, 3),
+        "chars_per_sec": round(chars / best),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/segment on synthetic text.")
+    parser.add_argument("--chars", type=int, nargs="+", default=[1_000, 10_000, 50_000, 100_000],
+                        help="Document sizes to generate, in characters")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per size (best is reported)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the documents")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # Importing the app opens (and on first run builds) data/cedict.idx.
+    from app import app, dictionary
+    client = app.test_client()
+
+    print(f"{'Chars':>10}{'Tokens':>10}{'Segment (ms)':>15}{'Request (ms)':>15}{'Chars/s':>12}")
+    print("-" * 62)
+
+    results = []
+    for chars in args.chars:
+        result = run_size(client, dictionary, chars, args.repeat, args.seed)
+        results.append(result)
+        print(f"{result['chars']:>10}{result['tokens']:>10}{result['segment_ms']:>15.2f}"
+              f"{result['request_ms']:>15.2f}{result['chars_per_sec']:>12}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"version": dictionary.version, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+"""
+Compile CEDICT into a binary index that every worker memory-maps read-only.
+
+Layout (native byte order, sections 8-byte aligned):
+
+    header   MAGIC, format version, section count, source SHA-1 (40 ASCII bytes)
+    sections one (name, offset, length) entry per section, then the sections
+
+Sections:
+
+    entries    record table, one record per CEDICT line (every reading kept):
+               "traditional\tsimplified\tnumbered pinyin\ttone-marked pinyin\tmeaning"
+    headwords  key table: traditional and simplified forms -> entry ids
+    english    key table: English gloss tokens -> entry ids
+    pinyin     key table: toneless pinyin, each syllable and the joined
+               word (e.g. "ni", "hao", "nihao") -> entry ids
+    trie       character trie over the headwords, for segmenting running text
+
+A record table is ``u32 count, u32 offsets[count + 1], blob``. A key table
+is a sorted string table:
+
+    u32 count
+    u32 key_offsets[count + 1]     into the key blob
+    u32 value_offsets[count + 1]   into the value blob
+    key blob, value blob           keys UTF-8 sorted bytewise, values
+                                   ascending u32 entry ids
+
+Lookups binary-search the offsets in place, so only the pages they touch
+are read and all workers share the same page cache.
+
+The trie is stored breadth-first with each node's children contiguous and
+sorted by code point:
+
+    u32 node_count, u32 edge_count
+    u32 edge_start[node_count + 1]   children of node n: edges edge_start[n]..[n + 1]
+    u32 terminal[node_count]         1 + headword key position, 0 if no word ends here
+    u32 edge_char[edge_count]        code point on the edge
+    u32 edge_child[edge_count]       node the edge leads to
+
+Build it with:  python cedict_index.py [data/cedict.txt] [data/cedict.idx]
+"""
+import bisect
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"CEDXIDX\0"
+FORMAT_VERSION = 5
+ENTRY_FIELDS = ("traditional", "simplified", "pinyin_numbered", "pinyin", "meaning")
+WORD_RE = re.compile(r"[a-z0-9]+")
+HEADER = struct.Struct("=8sII40s")
+SECTION = struct.Struct("=16sQQ")
+
+
+# Combining marks for tones 1-4; NFC folds them into ā, Á, ǚ and so on.
+TONE_MARKS = {"1": "\u0304", "2": "\u0301", "3": "\u030c", "4": "\u0300"}
+
+
+# Convert one numbered pinyin syllable (hao3) → tone marks (hǎo)
+def convert_pinyin(syllable):
+
+    syllable = syllable.replace("u:", "ü").replace("U:", "Ü").replace("v", "ü").replace("V", "Ü")
+
+    tone = syllable[-1:]
+    if not tone.isdigit():
+        return syllable
+
+    base = syllable[:-1]
+    if tone not in TONE_MARKS:
+        return base  # neutral tone (5) carries no mark
+
+    # The mark goes on a or e if present, on the o of "ou",
+    # otherwise on the last vowel (liu2 -> liú, gui4 -> guì).
+    lower = base.lower()
+    if "a" in lower:
+        at = lower.index("a")
+    elif "e" in lower:
+        at = lower.index("e")
+    elif "ou" in lower:
+        at = lower.index("o")
+    else:
+        vowels = [i for i, c in enumerate(lower) if c in "aeiouü"]
+        if vowels:
+            at = vowels[-1]
+        elif lower[:1] in ("m", "n"):
+            at = 0  # syllabic m / n / ng (m2 -> ḿ)
+        else:
+            return base
+
+    return unicodedata.normalize("NFC", base[:at + 1] + TONE_MARKS[tone] + base[at + 1:])
+
+
+def mark_pinyin(pinyin: str) -> str:
+    """Tone-mark every syllable of a numbered pinyin string ("lu:4 se4 de5" -> "lǜ sè de")."""
+    return " ".join(convert_pinyin(syllable) for syllable in pinyin.split())
+
+
+def toneless_syllables(pinyin: str) -> List[str]:
+    """Lower-case pinyin syllables without tone numbers or marks ("Nǐ hao3" -> ["ni", "hao"])."""
+    pinyin = pinyin.lower().replace("u:", "v").replace("ü", "v")
+    pinyin = "".join(
+        c for c in unicodedata.normalize("NFD", pinyin) if not unicodedata.combining(c)
+    )
+    return [s for s in re.split(r"[^a-z]+", pinyin) if s]
+
+
+def english_tokens(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+# ------------------------------
+# Parsing
+# ------------------------------
+def parse_cedict(path: str) -> Iterator[Tuple[str, str, str, str]]:
+    """Yield (traditional, simplified, numbered pinyin, meaning) for each entry."""
+    with open(path, encoding="utf-8") as f:
+
+        for line in f:
+
+            if line.startswith("#"):
+                continue
+
+            parts = line.split(" ")
+
+            if len(parts) > 2:
+
+                try:
+
+                    pinyin = line.split("[")[1].split("]")[0]
+
+                    meanings = line.split("/")[1:-1]
+                    meaning = ", ".join(meanings)
+
+                except IndexError:
+                    continue
+
+                yield parts[0], parts[1], pinyin, meaning
+
+
+# ------------------------------
+# Writing
+# ------------------------------
+def _pack_records(records: List[bytes]) -> bytes:
+    """Serialise a list of byte strings addressed by position."""
+    offsets = array("I", [0])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    return struct.pack("=I", len(records)) + offsets.tobytes() + b"".join(records)
+
+
+def _pack_table(items: Dict[bytes, bytes]) -> bytes:
+    """Serialise a key → value mapping as a sorted string table."""
+    keys = sorted(items)
+    key_offsets = array("I", [0])
+    value_offsets = array("I", [0])
+    key_blob = bytearray()
+    value_blob = bytearray()
+
+    for key in keys:
+        key_blob += key
+        value_blob += items[key]
+        key_offsets.append(len(key_blob))
+        value_offsets.append(len(value_blob))
+
+    return (
+        struct.pack("=I", len(keys))
+        + key_offsets.tobytes()
+        + value_offsets.tobytes()
+        + bytes(key_blob)
+        + bytes(value_blob)
+    )
+
+
+def _pack_postings(postings: Dict[str, List[int]]) -> bytes:
+    return _pack_table({
+        key.encode("utf-8"): array("I", sorted(set(ids))).tobytes()
+        for key, ids in postings.items()
+    })
+
+
+def _pack_trie(words: List[str]) -> bytes:
+    """Serialise a trie over words, marking each word's end with 1 + its position."""
+    children: List[Dict[str, int]] = [{}]
+    terminal = [0]
+    for position, word in enumerate(words):
+        node = 0
+        for char in word:
+            child = children[node].get(char)
+            if child is None:
+                child = children[node][char] = len(children)
+                children.append({})
+                terminal.append(0)
+            node = child
+        terminal[node] = position + 1
+
+    # Renumber breadth-first so every node's children are contiguous.
+    order = [0]
+    for node in order:
+        order.extend(children[node][char] for char in sorted(children[node]))
+    new_id = {old: new for new, old in enumerate(order)}
+
+    edge_start = array("I", [0])
+    edge_char = array("I")
+    edge_child = array("I")
+    for node in order:
+        for char in sorted(children[node]):
+            edge_char.append(ord(char))
+            edge_child.append(new_id[children[node][char]])
+        edge_start.append(len(edge_char))
+
+    return (
+        struct.pack("=II", len(order), len(edge_char))
+        + edge_start.tobytes()
+        + array("I", (terminal[node] for node in order)).tobytes()
+        + edge_char.tobytes()
+        + edge_child.tobytes()
+    )
+
+
+def _write_sections(
+    dst: str,
+    digest: str,
+    sections: Dict[str, bytes],
+    magic: bytes = MAGIC,
+    version: int = FORMAT_VERSION,
+) -> None:
+    """Write the header, directory and 8-byte aligned sections atomically."""
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory = []
+    for name, data in sections.items():
+        offset += -offset % 8
+        directory.append((name, offset, len(data)))
+        offset += len(data)
+
+    fd, tmp = tempfile.mkstemp(prefix=".cedict-", dir=os.path.dirname(os.path.abspath(dst)))
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(magic, version, len(sections), digest.encode("ascii")))
+        for name, start, length in directory:
+            f.write(SECTION.pack(name.encode("ascii"), start, length))
+        for (name, start, _), data in zip(directory, sections.values()):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, dst)
+
+
+def source_digest(src: str) -> str:
+    """SHA-1 of the CEDICT source, used as the dictionary version."""
+    sha = hashlib.sha1()
+    with open(src, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def build_index(src: str, dst: str) -> None:
+    """Compile the CEDICT text file at src into a binary index at dst."""
+    records: List[bytes] = []
+    headwords: Dict[str, List[int]] = defaultdict(list)
+    english: Dict[str, List[int]] = defaultdict(list)
+    pinyin_terms: Dict[str, List[int]] = defaultdict(list)
+
+    for entry_id, (trad, simp, pinyin, meaning) in enumerate(parse_cedict(src)):
+        records.append(
+            "\t".join((trad, simp, pinyin, mark_pinyin(pinyin), meaning)).encode("utf-8")
+        )
+
+        headwords[trad].append(entry_id)
+        headwords[simp].append(entry_id)
+
+        # Kept apart so "she" finds 她 in English without 蛇 (she2), and vice versa.
+        syllables = toneless_syllables(pinyin)
+        for term in syllables + ["".join(syllables)]:
+            pinyin_terms[term].append(entry_id)
+        for term in english_tokens(meaning):
+            english[term].append(entry_id)
+
+    _write_sections(dst, source_digest(src), {
+        "entries": _pack_records(records),
+        "headwords": _pack_postings(headwords),
+        "english": _pack_postings(english),
+        "pinyin": _pack_postings(pinyin_terms),
+        # Trie terminals point at positions in the (bytewise sorted) headword table.
+        "trie": _pack_trie(sorted(headwords, key=lambda word: word.encode("utf-8"))),
+    })
+
+
+# ------------------------------
+# Reading
+# ------------------------------
+def _map_sections(
+    path: str, magic: bytes = MAGIC, version: int = FORMAT_VERSION
+) -> Tuple[mmap.mmap, str, Dict[str, memoryview]]:
+    """Memory-map a sectioned file and return (mmap, source digest, sections by name)."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mapped)
+
+    found_magic, found_version, count, digest = HEADER.unpack_from(buf, 0)
+    if found_magic != magic or found_version != version:
+        raise ValueError(f"{path} is not a version {version} {magic!r} file")
+
+    sections: Dict[str, memoryview] = {}
+    for i in range(count):
+        name, start, length = SECTION.unpack_from(buf, HEADER.size + i * SECTION.size)
+        sections[name.rstrip(b"\0").decode("ascii")] = buf[start:start + length]
+
+    return mapped, digest.decode("ascii"), sections
+
+
+class KeyTable:
+    """Read-only view of a sorted string table inside a memory-mapped buffer."""
+
+    def __init__(self, buf: memoryview) -> None:
+        (count,) = struct.unpack_from("=I", buf, 0)
+        offsets_size = 4 * (count + 1)
+        self.count = count
+        self.key_offsets = buf[4:4 + offsets_size].cast("I")
+        self.value_offsets = buf[4 + offsets_size:4 + 2 * offsets_size].cast("I")
+        keys_start = 4 + 2 * offsets_size
+        values_start = keys_start + self.key_offsets[count]
+        self.keys = buf[keys_start:values_start]
+        self.values = buf[values_start:values_start + self.value_offsets[count]]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        """The i-th key, so bisect can search the table directly."""
+        return bytes(self.keys[self.key_offsets[i]:self.key_offsets[i + 1]])
+
+    def value(self, i: int) -> bytes:
+        return bytes(self.values[self.value_offsets[i]:self.value_offsets[i + 1]])
+
+    def find(self, key: bytes) -> int:
+        """Index of key, or -1 if absent."""
+        i = bisect.bisect_left(self, key)
+        return i if i < self.count and self[i] == key else -1
+
+
+class RecordTable:
+    """Read-only view of a record table inside a memory-mapped buffer."""
+
+    def __init__(self, buf: memoryview) -> None:
+        (count,) = struct.unpack_from("=I", buf, 0)
+        self.count = count
+        self.offsets = buf[4:4 + 4 * (count + 1)].cast("I")
+        self.blob = buf[4 + 4 * (count + 1):]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class PostingTable(KeyTable):
+    """Key table whose values are ascending u32 entry ids."""
+
+    def postings(self, key: str) -> memoryview:
+        i = self.find(key.encode("utf-8"))
+        if i < 0:
+            return memoryview(b"").cast("I")
+        return self.postings_at(i)
+
+    def prefix_range(self, prefix: str) -> range:
+        """Positions of every key starting with prefix."""
+        start = prefix.encode("utf-8")
+        lo = bisect.bisect_left(self, start)
+        hi = bisect.bisect_left(self, start + b"\xff", lo)
+        return range(lo, hi)
+
+    def postings_at(self, i: int) -> memoryview:
+        return self.values[self.value_offsets[i]:self.value_offsets[i + 1]].cast("I")
+
+
+class Trie:
+    """Read-only view of the headword trie inside a memory-mapped buffer."""
+
+    def __init__(self, buf: memoryview) -> None:
+        nodes, edges = struct.unpack_from("=II", buf, 0)
+        offset = 8
+        self.edge_start = buf[offset:offset + 4 * (nodes + 1)].cast("I")
+        offset += 4 * (nodes + 1)
+        self.terminal = buf[offset:offset + 4 * nodes].cast("I")
+        offset += 4 * nodes
+        self.edge_char = buf[offset:offset + 4 * edges].cast("I")
+        offset += 4 * edges
+        self.edge_child = buf[offset:offset + 4 * edges].cast("I")
+
+    def longest_match(self, text: str, start: int) -> Tuple[int, int]:
+        """
+        End of the longest headword starting at text[start] and its headword
+        key position, or (start, -1) if no headword starts there.
+        """
+        edge_start, terminal = self.edge_start, self.terminal
+        edge_char, edge_child = self.edge_char, self.edge_child
+        bisect_left = bisect.bisect_left
+
+        node = 0
+        best_end, best_key = start, -1
+        for end in range(start + 1, len(text) + 1):
+            lo, hi = edge_start[node], edge_start[node + 1]
+            code = ord(text[end - 1])
+            k = bisect_left(edge_char, code, lo, hi)
+            if k == hi or edge_char[k] != code:
+                break
+            node = edge_child[k]
+            if terminal[node]:
+                best_end, best_key = end, terminal[node] - 1
+        return best_end, best_key
+
+
+def _intersect(lists: List[memoryview], limit: int, block: int = 512) -> List[int]:
+    """
+    Ids present in every ascending list. The shortest list is consumed in
+    blocks; each block is intersected with the matching id range of the
+    others, so dense matches stop early and sparse ones skip whole ranges.
+    """
+    if not lists:
+        return []
+    shortest, *others = sorted(lists, key=len)
+    starts = [0] * len(others)
+    result: List[int] = []
+
+    for lo in range(0, len(shortest), block):
+        chunk = shortest[lo:lo + block]
+        common = set(chunk)
+        for k, ids in enumerate(others):
+            start = bisect.bisect_left(ids, chunk[0], starts[k])
+            stop = starts[k] = bisect.bisect_right(ids, chunk[-1], start)
+            common.intersection_update(ids[start:stop])
+        result.extend(sorted(common))
+        if len(result) >= limit:
+            break
+
+    return result[:limit]
+
+
+class CedictIndex:
+    """
+    Memory-mapped CEDICT index keeping every reading of every headword.
+
+    ``lookup`` matches traditional or simplified forms exactly, ``prefix``
+    matches headword prefixes, and ``search_english`` / ``search_pinyin``
+    query the inverted index. ``word in index`` and ``index[word]`` keep
+    working as with the old in-memory dict, with all readings merged.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._mmap, self.version, self.sections = _map_sections(path)
+
+        self.entries = RecordTable(self.sections["entries"])
+        self.headwords = PostingTable(self.sections["headwords"])
+        self.english = PostingTable(self.sections["english"])
+        self.pinyin = PostingTable(self.sections["pinyin"])
+        self.trie = Trie(self.sections["trie"])
+
+    def entry(self, entry_id: int) -> Dict[str, str]:
+        return dict(zip(ENTRY_FIELDS, self.entries[entry_id].decode("utf-8").split("\t")))
+
+    def _entries(self, ids: Iterable[int]) -> List[Dict[str, str]]:
+        return [self.entry(entry_id) for entry_id in ids]
+
+    def lookup(self, word: str) -> List[Dict[str, str]]:
+        """Every entry whose traditional or simplified form is exactly word."""
+        return self._entries(self.headwords.postings(word))
+
+    def prefix(self, prefix: str, limit: int = 50) -> List[Dict[str, str]]:
+        """Entries whose headword starts with prefix, in headword order."""
+        if not prefix:
+            return []
+        ids: List[int] = []
+        seen = set()
+        for i in self.headwords.prefix_range(prefix):
+            for entry_id in self.headwords.postings_at(i):
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    ids.append(entry_id)
+            if len(ids) >= limit:
+                break
+        return self._entries(ids[:limit])
+
+    def search_english(self, query: str, limit: int = 50) -> List[Dict[str, str]]:
+        """Entries whose gloss contains every word of query."""
+        tokens = english_tokens(query)
+        return self._entries(_intersect([self.english.postings(t) for t in tokens], limit))
+
+    def search_pinyin(self, query: str, limit: int = 50) -> List[Dict[str, str]]:
+        """Entries whose pinyin contains every syllable of query, ignoring tones."""
+        syllables = toneless_syllables(query)
+        if not syllables:
+            return []
+
+        # Whole-word matches first: "ni hao" and "nihao" both hit the joined form.
+        ids = list(self.pinyin.postings("".join(syllables))[:limit])
+        if len(syllables) > 1 and len(ids) < limit:
+            seen = set(ids)
+            more = _intersect([self.pinyin.postings(s) for s in syllables], limit + len(ids))
+            ids.extend(entry_id for entry_id in more if entry_id not in seen)
+        return self._entries(ids[:limit])
+
+    def segment(self, text: str) -> Iterator[Tuple[str, int]]:
+        """
+        Split text by forward maximum matching in one pass: yield
+        (word, headword key position) for dictionary words and
+        (run, -1) for runs of characters no headword starts with.
+        """
+        longest_match = self.trie.longest_match
+        pending = i = 0
+        while i < len(text):
+            end, key = longest_match(text, i)
+            if key < 0:
+                i += 1
+                continue
+            if pending < i:
+                yield text[pending:i], -1
+            yield text[i:end], key
+            pending = i = end
+        if pending < len(text):
+            yield text[pending:], -1
+
+    def annotate(self, text: str) -> List[Dict[str, str]]:
+        """
+        Segment text and attach the first reading's tone-marked pinyin and
+        meaning to each dictionary word; other runs carry only "text".
+        """
+        readings: Dict[int, Dict[str, str]] = {}
+        tokens = []
+        for word, key in self.segment(text):
+            if key < 0:
+                tokens.append({"text": word})
+                continue
+            reading = readings.get(key)
+            if reading is None:
+                entry = self.entry(self.headwords.postings_at(key)[0])
+                reading = readings[key] = {"pinyin": entry["pinyin"], "meaning": entry["meaning"]}
+            tokens.append({"text": word, **reading})
+        return tokens
+
+    def get(self, word: str) -> Optional[Dict[str, str]]:
+        entries = self.lookup(word)
+        if not entries:
+            return None
+        return {
+            "pinyin": " / ".join(e["pinyin"] for e in entries),
+            "meaning": " / ".join(e["meaning"] for e in entries),
+        }
+
+    def __contains__(self, word: str) -> bool:
+        return len(self.headwords.postings(word)) > 0
+
+    def __getitem__(self, word: str) -> Dict[str, str]:
+        entry = self.get(word)
+        if entry is None:
+            raise KeyError(word)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def _index_is_current(src: str, dst: str) -> bool:
+    try:
+        if os.path.getmtime(dst) < os.path.getmtime(src):
+            return False
+        with open(dst, "rb") as f:
+            magic, version, _, _ = HEADER.unpack(f.read(HEADER.size))
+        return magic == MAGIC and version == FORMAT_VERSION
+    except (OSError, struct.error):
+        return False
+
+
+def open_index(src: str = "data/cedict.txt", dst: str = "data/cedict.idx") -> CedictIndex:
+    """Open the compiled index, (re)building it first if it is missing or stale."""
+    if not _index_is_current(src, dst):
+        build_index(src, dst)
+    return CedictIndex(dst)
+
+
+if __name__ == "__main__":
+    args: List[str] = sys.argv[1:]
+    source = args[0] if args else "data/cedict.txt"
+    target = args[1] if len(args) > 1 else "data/cedict.idx"
+    build_index(source, target)
+    print(f"Wrote {target} ({len(CedictIndex(target))} entries)")
@@ -0,0 +1,100 @@
+"""
+Pack hanzi-writer-data's per-character stroke JSON into a single file that
+the app memory-maps, instead of fetching thousands of tiny files from a CDN.
+
+The archive uses the same sectioned layout as the CEDICT index (see
+cedict_index.py) with its own magic. Its one "strokes" section is a key
+table: UTF-8 character -> zlib-compressed, minified stroke JSON.
+
+Build it from a checkout of https://github.com/chanind/hanzi-writer-data
+(or the unpacked npm package) with:
+
+    python stroke_data.py path/to/hanzi-writer-data/data [data/strokes.idx]
+"""
+import hashlib
+import json
+import os
+import sys
+import zlib
+from typing import Dict, Iterable, Optional
+
+from cedict_index import KeyTable, _map_sections, _pack_table, _write_sections
+
+STROKE_MAGIC = b"HZSTROKE"
+STROKE_FORMAT_VERSION = 1
+
+
+def build_strokes(src_dir: str, dst: str) -> int:
+    """Pack every <character>.json under src_dir into dst; return the character count."""
+    items: Dict[bytes, bytes] = {}
+    sha = hashlib.sha1()
+
+    for name in sorted(os.listdir(src_dir)):
+        char, ext = os.path.splitext(name)
+        if ext != ".json" or len(char) != 1:
+            continue
+
+        with open(os.path.join(src_dir, name), "rb") as f:
+            raw = f.read()
+        sha.update(name.encode("utf-8") + b"\0" + raw)
+
+        minified = json.dumps(json.loads(raw), separators=(",", ":")).encode("utf-8")
+        items[char.encode("utf-8")] = zlib.compress(minified, 9)
+
+    _write_sections(
+        dst,
+        sha.hexdigest(),
+        {"strokes": _pack_table(items)},
+        magic=STROKE_MAGIC,
+        version=STROKE_FORMAT_VERSION,
+    )
+    return len(items)
+
+
+class StrokeArchive:
+    """Memory-mapped stroke archive; get() returns a character's stroke JSON as bytes."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._mmap, self.version, sections = _map_sections(
+            path, STROKE_MAGIC, STROKE_FORMAT_VERSION
+        )
+        self.table = KeyTable(sections["strokes"])
+
+    def get(self, char: str) -> Optional[bytes]:
+        i = self.table.find(char.encode("utf-8"))
+        if i < 0:
+            return None
+        return zlib.decompress(self.table.value(i))
+
+    def get_many(self, chars: Iterable[str]) -> bytes:
+        """
+        One JSON object mapping each character to its stroke data (null if
+        unknown), spliced from the stored JSON without re-serialising it.
+        """
+        parts = []
+        for char in dict.fromkeys(chars):
+            data = self.get(char)
+            parts.append(json.dumps(char).encode("utf-8") + b":" + (data or b"null"))
+        return b"{" + b",".join(parts) + b"}"
+
+    def __contains__(self, char: str) -> bool:
+        return self.table.find(char.encode("utf-8")) >= 0
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def open_strokes(path: str = "data/strokes.idx") -> Optional[StrokeArchive]:
+    """Open the stroke archive, or return None if it has not been built."""
+    if not os.path.exists(path):
+        return None
+    return StrokeArchive(path)
+
+
+if __name__ == "__main__":
+    if not 2 <= len(sys.argv) <= 3:
+        sys.exit("usage: python stroke_data.py path/to/hanzi-writer-data/data [data/strokes.idx]")
+    target = sys.argv[2] if len(sys.argv) > 2 else "data/strokes.idx"
+    count = build_strokes(sys.argv[1], target)
+    print(f"Wrote {target} ({count} characters)")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bytes hashed from each end of a file in the partial stage.
+PARTIAL_BYTES = 4096
+
+# Read size for full hashes; large reads keep the syscall count low.
+CHUNK_SIZE = 1024 * 1024
+
+FileMatch = Tuple[str, int]  # (path, size in bytes)
+HashResult = Tuple[Optional[bytes], int]  # (digest, or None if unreadable; bytes read)
+
+
+def _partial_digest(match: FileMatch) -> HashResult:
+    """
+    Hash the first and last PARTIAL_BYTES of a file (all of it if it is
+    smaller than both together).
+    """
+    path, size = match
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(PARTIAL_BYTES)
+            h.update(head)
+            read = len(head)
+            if size > 2 * PARTIAL_BYTES:
+                f.seek(-PARTIAL_BYTES, os.SEEK_END)
+                tail = f.read(PARTIAL_BYTES)
+            else:
+                tail = f.read()
+            h.update(tail)
+            read += len(tail)
+    except OSError:
+        return None, 0
+    return h.digest(), read
+
+
+def _full_digest(match: FileMatch) -> HashResult:
+    """Hash a whole file in CHUNK_SIZE reads into one reused buffer."""
+    path, _ = match
+    h = hashlib.blake2b()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    read = 0
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                h.update(view[:n])
+                read += n
+    except OSError:
+        return None, read
+    return h.digest(), read
+
+
+def _regroup(
+    pool: ThreadPoolExecutor,
+    groups: List[List[FileMatch]],
+    hasher: Callable[[FileMatch], HashResult],
+    stats: Dict[str, int],
+    counter: str,
+) -> List[List[FileMatch]]:
+    """Split each group by the digest hasher returns; keep groups with 2+ files."""
+    matches = [match for group in groups for match in group]
+
+    # Sizes already split the groups, so (size, digest) identifies a new group.
+    split: Dict[Tuple[int, bytes], List[FileMatch]] = defaultdict(list)
+    for match, (digest, read) in zip(matches, pool.map(hasher, matches)):
+        stats["bytes_read"] += read
+        stats[counter] += 1
+        if digest is not None:
+            split[(match[1], digest)].append(match)
+
+    return [group for group in split.values() if len(group) > 1]
+
+
+def find_duplicates(
+    matches: Iterable[FileMatch], threads: int = 8
+) -> Tuple[List[List[FileMatch]], Dict[str, int]]:
+    """
+    Group files with identical contents. Returns the groups (2+ files each,
+    largest files first) and counters: files and total_bytes seen,
+    partial_hashes and full_hashes done, and bytes_read.
+
+    Stages, each only on what the previous one could not tell apart:
+    1. group by size (no reads);
+    2. hash the first and last PARTIAL_BYTES of each candidate;
+    3. hash the whole file, skipped for files the partial hash already read
+       in full.
+    Hashing runs on a pool of `threads` threads. Empty files are ignored.
+    """
+    stats = {"files": 0, "total_bytes": 0, "partial_hashes": 0, "full_hashes": 0, "bytes_read": 0}
+
+    by_size: Dict[int, List[FileMatch]] = defaultdict(list)
+    for path, size in matches:
+        stats["files"] += 1
+        stats["total_bytes"] += size
+        if size > 0:
+            by_size[size].append((path, size))
+    candidates = [group for group in by_size.values() if len(group) > 1]
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        candidates = _regroup(pool, candidates, _partial_digest, stats, "partial_hashes")
+
+        confirmed = [group for group in candidates if group[0][1] <= 2 * PARTIAL_BYTES]
+        large = [group for group in candidates if group[0][1] > 2 * PARTIAL_BYTES]
+        confirmed += _regroup(pool, large, _full_digest, stats, "full_hashes")
+
+    for group in confirmed:
+        group.sort()
+    confirmed.sort(key=lambda group: (-group[0][1], group[0][0]))
+    return confirmed, stats
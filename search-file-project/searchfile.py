@@ -1,7 +1,26 @@
 import os
+import sys
+import csv
+import json
+import heapq
+import re
+import time
+import fnmatch
+from datetime import datetime
 from pathlib import Path
 import argparse
-from typing import Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from duplicates import find_duplicates
+from size_index import SizeIndex
+
+# Each implementation has an iter_* generator that yields (path, size) as
+# files are found, so output can stream and memory does not grow with the
+# number of matches. The search_* functions collect the same into a dict.
+
+FileMatch = Tuple[str, int]  # (path, size in bytes)
 
 # ------------------------------
 
@@ -9,24 +28,29 @@ from typing import Dict, List
 
 # ------------------------------
 
-def search_recursive(path: str, min_size: int, found_files: Dict[str, int] = None) -> Dict[str, int]:
+def iter_recursive(path: str, min_size: int) -> Iterator[FileMatch]:
     """
-    Recursively search for files larger than min_size.
+    Recursively yield files larger than min_size.
     """
-    if found_files is None:
-        found_files = {}
-
     try:
         if os.path.isfile(path):
             size = os.path.getsize(path)
             if size >= min_size:
-                found_files[path] = size
+                yield path, size
         elif os.path.isdir(path):
             for entry in os.listdir(path):
-                search_recursive(os.path.join(path, entry), min_size, found_files)
+                yield from iter_recursive(os.path.join(path, entry), min_size)
     except PermissionError:
         pass  # skip files/directories without permission
 
+
+def search_recursive(path: str, min_size: int, found_files: Dict[str, int] = None) -> Dict[str, int]:
+    """
+    Recursively search for files larger than min_size.
+    """
+    if found_files is None:
+        found_files = {}
+    found_files.update(iter_recursive(path, min_size))
     return found_files
 
 
@@ -36,20 +60,26 @@ def search_recursive(path: str, min_size: int, found_files: Dict[str, int] = Non
 
 # ------------------------------
 
-def search_iterative(path: str, min_size: int) -> Dict[str, int]:
+def iter_iterative(path: str, min_size: int) -> Iterator[FileMatch]:
     """
-    Iteratively search for files larger than min_size using os.walk.
+    Iteratively yield files larger than min_size using os.walk.
     """
-    found_files = {}
     for root, dirs, files in os.walk(path):
         for file in files:
             filepath = os.path.join(root, file)
             try:
-                if os.path.getsize(filepath) >= min_size:
-                    found_files[filepath] = os.path.getsize(filepath)
+                size = os.path.getsize(filepath)
             except PermissionError:
                 continue
-    return found_files
+            if size >= min_size:
+                yield filepath, size
+
+
+def search_iterative(path: str, min_size: int) -> Dict[str, int]:
+    """
+    Iteratively search for files larger than min_size using os.walk.
+    """
+    return dict(iter_iterative(path, min_size))
 
 
 # ------------------------------
@@ -58,20 +88,271 @@ def search_iterative(path: str, min_size: int) -> Dict[str, int]:
 
 # ------------------------------
 
-def search_pathlib(path: str, min_size: int) -> Dict[str, int]:
+def iter_pathlib(path: str, min_size: int) -> Iterator[FileMatch]:
     """
-    Search for files larger than min_size using pathlib.
+    Yield files larger than min_size using pathlib.
     """
-    found_files = {}
     p = Path(path)
     for f in p.rglob("*"):
         if f.is_file():
             try:
-               if f.stat().st_size >= min_size:
-                   found_files[str(f)] = f.stat().st_size
+               size = f.stat().st_size
             except PermissionError:
                continue
-    return found_files
+            if size >= min_size:
+                yield str(f), size
+
+
+def search_pathlib(path: str, min_size: int) -> Dict[str, int]:
+    """
+    Search for files larger than min_size using pathlib.
+    """
+    return dict(iter_pathlib(path, min_size))
+
+
+# ------------------------------
+
+# Filters pushed down into the scandir walker
+
+# ------------------------------
+
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    A point in time as a timestamp: either an age such as "90s", "30m",
+    "12h", "7d" or "2w" before now, or an ISO date such as "2024-01-31".
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", value.strip())
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * AGE_UNITS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an age like 7d or a date like 2024-01-31, got {value!r}")
+
+
+def _glob_regex(patterns: Iterable[str]) -> Optional["re.Pattern"]:
+    """One compiled regex matching any of the globs, or None for no globs."""
+    patterns = [os.path.normcase(p) for p in patterns]
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+class FileFilter:
+    """
+    Filters applied while walking, cheapest first:
+
+    * exclude globs and max_depth prune directories before they are listed;
+    * exclude/include globs and extensions reject files by name, before stat;
+    * newer_than/older_than (timestamps) use the stat already done for size.
+
+    Globs match entry names (".git", "node_modules", "*.min.js"), case-
+    insensitively where the OS is. max_depth=1 searches only the top directory.
+    """
+
+    def __init__(
+        self,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        extensions: Iterable[str] = (),
+        newer_than: Optional[float] = None,
+        older_than: Optional[float] = None,
+        max_depth: Optional[int] = None,
+    ) -> None:
+        self.include = _glob_regex(include)
+        self.exclude = _glob_regex(exclude)
+        self.extensions = tuple(
+            os.path.normcase("." + ext.lstrip(".")) for ext in extensions if ext.strip(".")
+        )
+        self.newer_than = newer_than
+        self.older_than = older_than
+        self.max_depth = max_depth
+
+    def prunes(self, name: str) -> bool:
+        """True if a directory with this name should not be entered."""
+        return self.exclude is not None and self.exclude.match(os.path.normcase(name)) is not None
+
+    def descends(self, depth: int) -> bool:
+        """True if subdirectories of a directory `depth` levels below the root are visited."""
+        return self.max_depth is None or depth + 1 < self.max_depth
+
+    def wants_name(self, name: str) -> bool:
+        name = os.path.normcase(name)
+        if self.exclude is not None and self.exclude.match(name):
+            return False
+        if self.include is not None and not self.include.match(name):
+            return False
+        return not self.extensions or name.endswith(self.extensions)
+
+    def wants_mtime(self, mtime: float) -> bool:
+        if self.newer_than is not None and mtime < self.newer_than:
+            return False
+        return self.older_than is None or mtime < self.older_than
+
+
+# ------------------------------
+
+# Implementation 4: os.scandir with a thread pool
+
+# ------------------------------
+
+DEFAULT_THREADS = 8
+
+DirKey = Tuple[int, int]  # (st_dev, st_ino) of a directory
+
+# Walk counters reported by iter_scandir(stats=...).
+SCAN_COUNTERS = ("dirs_listed", "entries_seen", "stat_calls", "dirs_pruned", "files_skipped")
+
+
+def _scan_directory(
+    path: str,
+    min_size: int,
+    follow_symlinks: bool,
+    file_filter: Optional[FileFilter] = None,
+    descend: bool = True,
+) -> Tuple[Dict[str, int], List[Tuple[str, Optional[DirKey]]], Dict[str, int]]:
+    """
+    List one directory. Returns the matching files, the subdirectories to
+    visit (each with its (st_dev, st_ino) when symlinks are followed) and
+    this directory's SCAN_COUNTERS.
+
+    File types come from the DirEntry (no syscall on most filesystems) and each
+    regular file costs one stat for its size; directories cost a stat only when
+    following symlinks, for loop detection. Files rejected by name and
+    directories pruned by file_filter (or not entered because descend is
+    False) cost no stat at all.
+    """
+    found_files: Dict[str, int] = {}
+    subdirs: List[Tuple[str, Optional[DirKey]]] = []
+    counts = dict.fromkeys(SCAN_COUNTERS, 0)
+
+    try:
+        with os.scandir(path) as entries:
+            counts["dirs_listed"] += 1
+            for entry in entries:
+                counts["entries_seen"] += 1
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if not descend or (file_filter and file_filter.prunes(entry.name)):
+                            counts["dirs_pruned"] += 1
+                            continue
+                        key = None
+                        if follow_symlinks:
+                            st = entry.stat()
+                            counts["stat_calls"] += 1
+                            key = (st.st_dev, st.st_ino)
+                        subdirs.append((entry.path, key))
+                    elif entry.is_file():
+                        if file_filter and not file_filter.wants_name(entry.name):
+                            counts["files_skipped"] += 1
+                            continue
+                        st = entry.stat()
+                        counts["stat_calls"] += 1
+                        if st.st_size >= min_size and (
+                            file_filter is None or file_filter.wants_mtime(st.st_mtime)
+                        ):
+                            found_files[entry.path] = st.st_size
+                except OSError:
+                    continue  # vanished, broken symlink or no permission
+    except OSError:
+        pass  # directory unreadable or removed mid-walk
+
+    return found_files, subdirs, counts
+
+
+def iter_scandir(
+    path: str,
+    min_size: int,
+    threads: int = DEFAULT_THREADS,
+    follow_symlinks: bool = False,
+    file_filter: Optional[FileFilter] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[FileMatch]:
+    """
+    Yield files larger than min_size with os.scandir, listing directories on
+    a pool of `threads` threads to overlap I/O latency. Matches are yielded a
+    directory at a time, as soon as that directory has been listed.
+    With follow_symlinks, directories already seen (same st_dev, st_ino)
+    are skipped, so symlink loops terminate. file_filter is applied during
+    the walk (see FileFilter); SCAN_COUNTERS are added into stats if given.
+    """
+    if stats is not None:
+        for counter in SCAN_COUNTERS:
+            stats.setdefault(counter, 0)
+
+    def scan(directory, depth):
+        descend = file_filter is None or file_filter.descends(depth)
+        return _scan_directory(directory, min_size, follow_symlinks, file_filter, descend), depth
+
+    def tally(counts):
+        if stats is not None:
+            for counter, n in counts.items():
+                stats[counter] += n
+
+    if not os.path.isdir(path):
+        try:
+            size = os.path.getsize(path)
+            if size >= min_size:
+                yield path, size
+        except OSError:
+            pass
+        return
+
+    visited: Set[DirKey] = set()
+    if follow_symlinks:
+        st = os.stat(path)
+        visited.add((st.st_dev, st.st_ino))
+
+    def schedule(subdirs):
+        # Yields the subdirectories not visited yet.
+        for subdir, key in subdirs:
+            if key is not None:
+                if key in visited:
+                    continue
+                visited.add(key)
+            yield subdir
+
+    if threads <= 1:
+        stack = [(path, 0)]
+        while stack:
+            (files, subdirs, counts), depth = scan(*stack.pop())
+            tally(counts)
+            yield from files.items()
+            stack.extend((subdir, depth + 1) for subdir in schedule(subdirs))
+        return
+
+    # Results come back to this thread, which alone touches visited and stats.
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = {pool.submit(scan, path, 0)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    (files, subdirs, counts), depth = future.result()
+                    tally(counts)
+                    for subdir in schedule(subdirs):
+                        pending.add(pool.submit(scan, subdir, depth + 1))
+                    yield from files.items()
+        finally:
+            # The consumer stopped early: drop directories not yet started.
+            for future in pending:
+                future.cancel()
+
+
+def search_scandir(
+    path: str,
+    min_size: int,
+    threads: int = DEFAULT_THREADS,
+    follow_symlinks: bool = False,
+    file_filter: Optional[FileFilter] = None,
+) -> Dict[str, int]:
+    """
+    Search for files larger than min_size with os.scandir (see iter_scandir).
+    """
+    return dict(iter_scandir(path, min_size, threads, follow_symlinks, file_filter))
 
 
 # ------------------------------
@@ -80,12 +361,74 @@ def search_pathlib(path: str, min_size: int) -> Dict[str, int]:
 
 # ------------------------------
 
+OUTPUT_FORMATS = ("text", "ndjson", "csv")
+
+
+def largest_files(matches: Iterable[FileMatch], n: int) -> List[FileMatch]:
+    """The n largest matches, biggest first, keeping only n in memory."""
+    return heapq.nlargest(n, matches, key=lambda match: match[1])
+
+
+def sort_results(matches: Iterable[FileMatch], order: str) -> List[FileMatch]:
+    """Sort by "size" (biggest first) or "name". Needs every match in memory."""
+    if order == "size":
+        return sorted(matches, key=lambda match: (-match[1], match[0]))
+    return sorted(matches)
+
+
+def write_results(matches: Iterable[FileMatch], fmt: str = "text", out: TextIO = sys.stdout) -> int:
+    """
+    Write matches as they arrive and return how many were written.
+    "text" is the aligned table, "ndjson" one {"path", "size"} object per
+    line and "csv" a path,size table with a header.
+    """
+    count = 0
+    if fmt == "ndjson":
+        for path, size in matches:
+            out.write(json.dumps({"path": path, "size": size}) + "\n")
+            count += 1
+    elif fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["path", "size"])
+        for path, size in matches:
+            writer.writerow([path, size])
+            count += 1
+    else:
+        print(f"{'Filename':<100}{'Size (bytes)':<20}", file=out)
+        print("-" * 120, file=out)
+        for path, size in matches:
+            print(f"{path:<100}{size:<20}", file=out)
+            count += 1
+        print(f"\nTotal files found: {count}", file=out)
+    return count
+
+
+def write_duplicates(groups: List[List[FileMatch]], fmt: str = "text", out: TextIO = sys.stdout) -> None:
+    """
+    Write duplicate groups: "text" as blocks of paths under a size heading,
+    "ndjson" one {"size", "paths"} object per group and "csv" one
+    group,size,path row per file.
+    """
+    if fmt == "ndjson":
+        for group in groups:
+            out.write(json.dumps({"size": group[0][1], "paths": [path for path, _ in group]}) + "\n")
+    elif fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["group", "size", "path"])
+        for number, group in enumerate(groups, 1):
+            for path, size in group:
+                writer.writerow([number, size, path])
+    else:
+        for group in groups:
+            print(f"\n{len(group)} files of {group[0][1]} bytes:", file=out)
+            for path, _ in group:
+                print(f"  {path}", file=out)
+        wasted = sum(group[0][1] * (len(group) - 1) for group in groups)
+        print(f"\nDuplicate groups found: {len(groups)} ({wasted} bytes reclaimable)", file=out)
+
+
 def print_results(files: Dict[str, int], verbose: bool):
-    print(f"{'Filename':<100}{'Size (bytes)':<20}")
-    print("-" * 120)
-    for f, size in files.items():
-        print(f"{f:<100}{size:<20}")
-    print(f"\nTotal files found: {len(files)}")
+    write_results(files.items())
 
 
 # ------------------------------
@@ -98,31 +441,127 @@ def main():
     parser = argparse.ArgumentParser(description="Search for files larger than a given size.")
     parser.add_argument("path", nargs="?", default=os.getcwd(), help="Directory path to start searching")
     parser.add_argument("min_size", type=float, help="Minimum file size in MB")
-    parser.add_argument("-m", "--method", choices=["recursive", "iterative", "pathlib", "all"],
+    parser.add_argument("-m", "--method", choices=["recursive", "iterative", "pathlib", "scandir", "all"],
                         default="all", help="Search method to use")
+    parser.add_argument("-t", "--threads", type=int, default=DEFAULT_THREADS,
+                        help="Directory-listing threads for the scandir method")
+    parser.add_argument("-L", "--follow-symlinks", action="store_true",
+                        help="Follow directory symlinks in the scandir method (loops are detected)")
+    parser.add_argument("-i", "--index", nargs="?", const="", metavar="DB",
+                        help="Answer from a persistent SQLite size index "
+                             "(default DB: ~/.cache/searchfile/index.sqlite3), building it on first use. "
+                             "A file rewritten or appended in place keeps its indexed size until "
+                             "'--refresh full'")
+    parser.add_argument("-r", "--refresh", nargs="?", const="changed", choices=["changed", "full"],
+                        help="With --index, rescan before querying: 'changed' (default) relists "
+                             "directories whose mtime changed; 'full' restats every file")
+    parser.add_argument("-n", "--top", type=int, metavar="N",
+                        help="Only show the N largest files (memory stays at N entries)")
+    parser.add_argument("-s", "--sort", choices=["size", "name"],
+                        help="Sort the output (without --top this holds every match in memory)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="text",
+                        help="Output format: aligned text, NDJSON or CSV (NDJSON/CSV use one scandir walk with --method all)")
+    parser.add_argument("-d", "--duplicates", action="store_true",
+                        help="Report groups of matched files with identical contents "
+                             "(size, then head/tail hash, then full hash)")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="Only files whose name matches (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Skip files and prune directories whose name matches, "
+                             "e.g. .git or node_modules (repeatable)")
+    parser.add_argument("-e", "--ext", action="append", default=[], metavar="EXT",
+                        help="Only files with these extensions (repeatable or comma-separated)")
+    parser.add_argument("--newer-than", type=parse_time, metavar="AGE|DATE",
+                        help="Only files modified after this (e.g. 7d, 12h, 2024-01-31)")
+    parser.add_argument("--older-than", type=parse_time, metavar="AGE|DATE",
+                        help="Only files modified before this")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="Descend at most N levels (1 = only the given directory)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
 
     args = parser.parse_args()
 
     min_size_bytes = int(args.min_size * 1024 * 1024)
 
+    extensions = [ext for value in args.ext for ext in value.split(",")]
+    file_filter = None
+    if (args.include or args.exclude or extensions or args.newer_than is not None
+            or args.older_than is not None or args.max_depth is not None):
+        if args.index is not None or args.method not in ("scandir", "all"):
+            parser.error("--include/--exclude/--ext/--newer-than/--older-than/--max-depth "
+                         "are applied during the walk and need --method scandir")
+        file_filter = FileFilter(args.include, args.exclude, extensions,
+                                 args.newer_than, args.older_than, args.max_depth)
+        # The other walkers cannot prune, so "all" means scandir here.
+        args.method = "scandir"
+
+    def report(matches: Iterable[FileMatch]):
+        if args.duplicates:
+            groups, stats = find_duplicates(matches, threads=args.threads)
+            write_duplicates(groups, args.format)
+            share = stats["bytes_read"] / stats["total_bytes"] if stats["total_bytes"] else 0
+            print(f"Read {stats['bytes_read']} of {stats['total_bytes']} bytes ({share:.2%}) "
+                  f"across {stats['files']} files: {stats['partial_hashes']} partial hashes, "
+                  f"{stats['full_hashes']} full hashes",
+                  file=sys.stdout if args.format == "text" else sys.stderr)
+            return
+        if args.top is not None:
+            matches = largest_files(matches, args.top)
+        if args.sort and not (args.top is not None and args.sort == "size"):
+            matches = sort_results(matches, args.sort)
+        write_results(matches, args.format)
+
+    if args.index is not None:
+        index = SizeIndex(args.index or None, threads=args.threads)
+        matches = None
+        try:
+            if args.refresh or not index.is_indexed(args.path):
+                stats = index.refresh(args.path, full=args.refresh == "full")
+                if args.verbose:
+                    print(f"Index {index.path}: checked {stats['dirs_checked']} directories, "
+                          f"relisted {stats['dirs_listed']}, removed {stats['dirs_removed']}",
+                          file=sys.stderr)
+            matches = index.iter_query(args.path, min_size_bytes)
+            report(matches)
+        finally:
+            # Release the query cursor before closing, even if output stopped early.
+            if matches is not None:
+                matches.close()
+            index.close()
+        return
+
+    walk_stats: Dict[str, int] = {}
     methods = {
-        "recursive": search_recursive,
-        "iterative": search_iterative,
-        "pathlib": search_pathlib
+        "recursive": iter_recursive,
+        "iterative": iter_iterative,
+        "pathlib": iter_pathlib,
+        "scandir": partial(iter_scandir, threads=args.threads,
+                           follow_symlinks=args.follow_symlinks,
+                           file_filter=file_filter, stats=walk_stats)
     }
 
+    if args.method == "all" and (args.duplicates or args.format != "text"):
+        # One walk is enough to find duplicates, and NDJSON/CSV output must be
+        # a single stream rather than one table per method.
+        args.method = "scandir"
+
     if args.method == "all":
         for name, func in methods.items():
             print(f"\n--- Using {name} method ---")
-            files = func(args.path, min_size_bytes)
-            print_results(files, args.verbose)
+            report(func(args.path, min_size_bytes))
     else:
-        func = methods[args.method]
-        files = func(args.path, min_size_bytes)
-        print_results(files, args.verbose)
+        report(methods[args.method](args.path, min_size_bytes))
+
+    if args.verbose and walk_stats:
+        print("scandir walk: " + ", ".join(f"{k}={walk_stats[k]}" for k in SCAN_COUNTERS),
+              file=sys.stderr)
 
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except BrokenPipeError:
+        # Output piped into e.g. head, which exited; stop quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+SCHEMA_VERSION = 1
+
+# Directories modified this recently (seconds) may change again within the
+# same mtime tick, so their mtime is not trusted and they are relisted next time.
+RACY_WINDOW = 2.0
+
+# Rows fetched per lock acquisition in iter_query().
+QUERY_BATCH = 1000
+
+FileRow = Tuple[str, int, int]  # (path, size, mtime_ns)
+
+
+def default_index_path() -> str:
+    """Return $XDG_CACHE_HOME/searchfile/index.sqlite3 (~/.cache by default)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "searchfile", "index.sqlite3")
+
+
+def _path_range(root: str) -> Tuple[str, str]:
+    """Bounds such that lo <= p < hi exactly for paths p under root."""
+    root = root.rstrip(os.sep)
+    return root + os.sep, root + chr(ord(os.sep) + 1)
+
+
+def _check_directory(
+    path: str, known_mtime: Optional[int]
+) -> Tuple[str, Optional[int], Optional[Tuple[List[FileRow], List[str]]]]:
+    """
+    Stat one directory and list it only if its mtime differs from known_mtime.
+    Returns (path, mtime_ns or None if it is gone, (files, subdirs) or None
+    if unchanged).
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None, None
+
+    if mtime == known_mtime:
+        return path, mtime, None
+
+    files: List[FileRow] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files.append((entry.path, st.st_size, st.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        pass  # unreadable: recorded as empty
+
+    return path, mtime, (files, subdirs)
+
+
+class SizeIndex:
+    """
+    Persistent SQLite index of file sizes under one or more directory trees.
+
+    Every file's path, size and mtime is stored together with each
+    directory's mtime. refresh() stats every known directory but relists
+    only those whose mtime changed (entries added, removed or renamed), so a
+    rescan of a mostly unchanged tree costs one stat per directory. A file
+    rewritten in place does not touch its directory's mtime; use
+    refresh(full=True) to pick that up. query() is a range scan on the size
+    index.
+    """
+
+    def __init__(self, path: Optional[str] = None, threads: int = 8) -> None:
+        self.path = path or default_index_path()
+        self.threads = threads
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._con:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.executescript("""
+                CREATE TABLE IF NOT EXISTS roots (
+                    path       TEXT PRIMARY KEY,
+                    refreshed  REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path      TEXT PRIMARY KEY,
+                    parent    TEXT,
+                    mtime_ns  INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    path      TEXT PRIMARY KEY,
+                    dir       TEXT NOT NULL,
+                    size      INTEGER NOT NULL,
+                    mtime_ns  INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS files_size ON files (size);
+                CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+            """)
+            self._con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def is_indexed(self, root: str) -> bool:
+        root = os.path.abspath(root)
+        with self._lock:
+            row = self._con.execute("SELECT 1 FROM roots WHERE path = ?", (root,)).fetchone()
+        return row is not None
+
+    def _known_dirs(self, root: str) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+        lo, hi = _path_range(root)
+        rows = self._con.execute(
+            "SELECT path, mtime_ns FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (root, lo, hi),
+        ).fetchall()
+        mtimes = dict(rows)
+        # Parents come from the path, not the stored column: a directory first
+        # indexed as its own root may have been stored without one.
+        children: Dict[str, List[str]] = defaultdict(list)
+        for path, _ in rows:
+            if path != root:
+                children[os.path.dirname(path)].append(path)
+        return mtimes, children
+
+    def _forget(self, path: str, children: Dict[str, List[str]]) -> int:
+        """Delete a directory and everything indexed below it; return the directory count."""
+        doomed = [path]
+        for directory in doomed:
+            doomed.extend(children.pop(directory, ()))
+        self._con.executemany("DELETE FROM files WHERE dir = ?", [(d,) for d in doomed])
+        self._con.executemany("DELETE FROM dirs WHERE path = ?", [(d,) for d in doomed])
+        self._con.executemany("DELETE FROM roots WHERE path = ?", [(d,) for d in doomed])
+        return len(doomed)
+
+    def refresh(self, root: str, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the index for root up to date and return counters: directories
+        checked, listed and removed, and file rows written.
+        """
+        root = os.path.abspath(root)
+        started = time.time_ns()
+        racy_ns = int(RACY_WINDOW * 1e9)
+        stats = {"dirs_checked": 0, "dirs_listed": 0, "dirs_removed": 0, "files_written": 0}
+
+        with self._lock, self._con:
+            mtimes, children = self._known_dirs(root)
+            if full:
+                mtimes = {}
+
+            def handle(result, submit):
+                path, mtime, listing = result
+                stats["dirs_checked"] += 1
+
+                if mtime is None:
+                    if path in mtimes or path in children:
+                        stats["dirs_removed"] += self._forget(path, children)
+                    return
+
+                if listing is None:
+                    for child in children.get(path, ()):
+                        submit(child)
+                    return
+
+                files, subdirs = listing
+                stats["dirs_listed"] += 1
+                stats["files_written"] += len(files)
+
+                stored = -1 if started - mtime < racy_ns else mtime
+                parent = os.path.dirname(path)
+                self._con.execute(
+                    "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (path, parent, stored)
+                )
+                self._con.execute("DELETE FROM files WHERE dir = ?", (path,))
+                self._con.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    [(file_path, path, size, file_mtime) for file_path, size, file_mtime in files],
+                )
+
+                current: Set[str] = set(subdirs)
+                for child in children.get(path, ()):
+                    if child not in current:
+                        stats["dirs_removed"] += self._forget(child, children)
+                children[path] = subdirs
+                for child in subdirs:
+                    submit(child)
+
+            # Workers only stat and list; this thread alone touches SQLite.
+            with ThreadPoolExecutor(max_workers=max(1, self.threads)) as pool:
+                pending = set()
+
+                def submit(path):
+                    pending.add(pool.submit(_check_directory, path, mtimes.get(path)))
+
+                submit(root)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future.result(), submit)
+
+            self._con.execute(
+                "INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, started / 1e9)
+            )
+            # Lets the planner choose between the size and path indexes in query().
+            self._con.execute("PRAGMA optimize")
+
+        return stats
+
+    def iter_query(self, root: str, min_size: int) -> Iterator[Tuple[str, int]]:
+        """Yield (path, size) for files under root of at least min_size bytes, path as given in root."""
+        lo, hi = _path_range(os.path.abspath(root))
+        skip = len(lo)
+        with self._lock:
+            cursor = self._con.execute(
+                "SELECT path, size FROM files WHERE size >= ? AND path >= ? AND path < ?",
+                (min_size, lo, hi),
+            )
+        try:
+            while True:
+                # The lock is held per batch, never across a yield, so a
+                # consumer that stops early cannot block close().
+                with self._lock:
+                    rows = cursor.fetchmany(QUERY_BATCH)
+                if not rows:
+                    break
+                for path, size in rows:
+                    yield os.path.join(root, path[skip:]), size
+        finally:
+            with self._lock:
+                try:
+                    cursor.close()
+                except sqlite3.ProgrammingError:
+                    pass  # the index was closed first
+
+    def query(self, root: str, min_size: int) -> Dict[str, int]:
+        """Files under root of at least min_size bytes, keyed by path as given in root."""
+        return dict(self.iter_query(root, min_size))
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
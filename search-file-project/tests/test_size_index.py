@@ -0,0 +1,72 @@
+"""SizeIndex against searchfile.search_scandir on small generated trees."""
+import os
+import shutil
+
+import pytest
+
+import searchfile
+from size_index import SizeIndex
+
+MB = 1024 * 1024
+
+
+def make_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SizeIndex(str(tmp_path / "index.sqlite3"), threads=2)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    make_file(str(root / "top.bin"), 2 * MB)
+    make_file(str(root / "a" / "b" / "x.bin"), 3 * MB)
+    make_file(str(root / "a" / "small.txt"), 10)
+    make_file(str(root / "c" / "y.bin"), 4 * MB)
+    return str(root)
+
+
+def test_query_matches_scandir(index, tree):
+    index.refresh(tree)
+    for min_size in (0, MB, 5 * MB):
+        assert index.query(tree, min_size) == searchfile.search_scandir(tree, min_size)
+
+
+def test_refresh_picks_up_added_and_removed_entries(index, tree):
+    index.refresh(tree)
+    make_file(os.path.join(tree, "c", "new.bin"), 2 * MB)
+    os.remove(os.path.join(tree, "top.bin"))
+    shutil.rmtree(os.path.join(tree, "a", "b"))
+
+    index.refresh(tree)
+    assert index.query(tree, 0) == searchfile.search_scandir(tree, 0)
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_nested_root_is_forgotten_with_its_ancestor(index, tree, full):
+    nested = os.path.join(tree, "a")
+    index.refresh(nested)
+    index.refresh(tree)
+
+    shutil.rmtree(nested)
+    index.refresh(tree, full=full)
+
+    assert index.query(tree, 0) == searchfile.search_scandir(tree, 0)
+    assert not any(path.startswith(nested + os.sep) for path in index.query(tree, 0))
+    assert index.query(nested, 0) == {}
+    assert not index.is_indexed(nested)
+
+
+def test_full_refresh_sees_files_grown_in_place(index, tree):
+    index.refresh(tree)
+    make_file(os.path.join(tree, "a", "small.txt"), 6 * MB)
+
+    index.refresh(tree, full=True)
+    assert index.query(tree, 5 * MB) == searchfile.search_scandir(tree, 5 * MB)
@@ -0,0 +1,317 @@
+"""
+Benchmark every searchPine_* implementation on synthetic SF street-tree CSVs
+of increasing size.
+
+Each method runs in its own process so peak RSS is per method. The report
+records wall time, rows/sec, peak memory and the (total, DPW, Monterey)
+counts, and flags sizes where the methods disagree. Methods listed in
+KNOWN_DIFFERENCES match "pine" differently by design; their disagreements are
+reported as known differences and do not fail the run.
+
+Example:
+    python benchmark.py --rows 10000 100000 1000000 --json report.json
+    python benchmark.py --rows 10000000 --methods searchPine_mmap searchPine_streaming:4
+"""
+import argparse
+import csv
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEARCH_TREE = os.path.join(HERE, "search-tree.py")
+
+HEADER = [
+    "TreeID", "qLegalStatus", "qSpecies", "qAddress", "SiteOrder", "qSiteInfo",
+    "PlantType", "qCaretaker", "qCareAssistant", "PlantDate", "DBH", "PlotSize",
+    "PermitNotes", "XCoord", "YCoord", "Latitude", "Longitude", "Location",
+]
+
+# Roughly the shape of the published list, including the rows that trip up
+# substring and whole-line matching (Pineapple Guava, addresses on Pine St).
+SPECIES = [
+    ("Platanus x hispanica :: Sycamore: London Plane", 110),
+    ("Lophostemon confertus :: Brisbane Box", 110),
+    ("Metrosideros excelsa :: New Zealand Xmas Tree", 85),
+    ("Tristaniopsis laurina :: Swamp Myrtle", 70),
+    ("Pittosporum undulatum :: Victorian Box", 65),
+    ("Tree(s) ::", 60),
+    ("Prunus cerasifera :: Cherry Plum", 55),
+    ("Arbutus 'Marina' :: Hybrid Strawberry Tree", 50),
+    ("Magnolia grandiflora :: Southern Magnolia", 45),
+    ("Ginkgo biloba :: Maidenhair Tree", 40),
+    ("Ficus microcarpa nitida 'Green Gem' :: Indian Laurel Fig Tree 'Green Gem'", 37),
+    ("Pyrus calleryana :: Ornamental Pear", 32),
+    ("Olea europaea :: Olive Tree", 30),
+    ("Corymbia ficifolia :: Red Flowering Gum", 28),
+    ("Ulmus parvifolia :: Chinese Elm", 20),
+    ("Cupressus macrocarpa :: Monterey Cypress", 15),
+    ("Pinus radiata :: Monterey Pine", 14),
+    ("Eucalyptus globulus :: Blue Gum", 9),
+    ("Pinus canariensis :: Canary Island Pine", 9),
+    ("Pinus pinea :: Italian Stone Pine", 5),
+    ("Pinus thunbergii :: Japanese Black Pine", 3),
+    ("Pinus halepensis :: Aleppo Pine", 2),
+    ("Feijoa sellowiana :: Pineapple Guava", 6),
+]
+OWNERS = [
+    ("DPW Maintained", 58),
+    ("Permitted Site", 36),
+    ("Undocumented", 3),
+    ("Significant Tree", 1),
+    ("Planning Code 138.1 required", 1),
+    ("Private", 1),
+]
+STREETS = [
+    "Market St", "Mission St", "Valencia St", "Geary Blvd", "Fell St", "19th Ave",
+    "Irving St", "Folsom St", "Divisadero St", "Noriega St", "Cesar Chavez St",
+    "Pine St",
+]
+SITE_INFO = ["Sidewalk: Curb side : Cutout", "Sidewalk: Property side : Yard", "Median : Cutout"]
+# Methods whose idea of "a pine" differs from is_pine() (the word "pine" in the
+# species' common name). Their counts are expected to differ on real data.
+KNOWN_DIFFERENCES = {
+    "searchPine_pandas": "substring match on the species: counts Pineapple Guava",
+    "searchPine_findall": "whole-line match: counts trees with a Pine St address",
+    "searchPine_csv_regex": "whole-line match: counts trees with a Pine St address "
+                            "and reads their species from the address",
+}
+NOTES = ["", "", "", "Permit Number 45678", "Replanted, see notes", 'Removed "hazard" limb']
+
+
+def generate_csv(file_path: str, rows: int, seed: int = 0) -> None:
+    """Write a deterministic CSV shaped like the SF Street Tree List."""
+    rng = random.Random(seed)
+    species, species_weights = zip(*SPECIES)
+    owners, owner_weights = zip(*OWNERS)
+    batch = 10_000
+
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for first in range(0, rows, batch):
+            n = min(batch, rows - first)
+            picked_species = rng.choices(species, species_weights, k=n)
+            picked_owners = rng.choices(owners, owner_weights, k=n)
+            for i in range(n):
+                lat = 37.70 + rng.random() * 0.11
+                lon = -122.51 + rng.random() * 0.15
+                # Some addresses carry a unit, so csv quotes them.
+                address = f"{rng.randint(1, 3999)} {rng.choice(STREETS)}"
+                if rng.random() < 0.1:
+                    address += f", Unit {rng.randint(1, 9)}"
+                writer.writerow([
+                    10_000 + first + i, picked_owners[i], picked_species[i], address,
+                    rng.randint(1, 9), rng.choice(SITE_INFO), "Tree", "Private", "",
+                    f"{rng.randint(1955, 2024)}-{rng.randint(1, 12):02d}-01T00:00:00",
+                    rng.randint(1, 48), f"{rng.randint(2, 6)}x{rng.randint(2, 6)}",
+                    rng.choice(NOTES), round(5_990_000 + rng.random() * 30_000, 3),
+                    round(2_090_000 + rng.random() * 30_000, 3), round(lat, 6),
+                    round(lon, 6), f"({lat:.6f}, {lon:.6f})",
+                ])
+
+
+def load_search_tree():
+    """Import search-tree.py (its name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location("search_tree", SEARCH_TREE)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so ProcessPoolExecutor workers can pickle its functions.
+    sys.modules["search_tree"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover_methods() -> List[str]:
+    """Every searchPine_* function, in file order, plus a parallel streaming run."""
+    module = load_search_tree()
+    functions = [
+        (func.__code__.co_firstlineno, name)
+        for name, func in inspect.getmembers(module, inspect.isfunction)
+        if name.startswith("searchPine_")
+    ]
+    methods = [name for _, name in sorted(functions)]
+    cores = os.cpu_count() or 1
+    if cores > 1 and "searchPine_streaming" in methods:
+        methods.append(f"searchPine_streaming:{cores}")
+    return methods
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_worker(method: str, file_path: str) -> None:
+    """Child process: run one method and print its timing and counts as JSON."""
+    module = load_search_tree()
+    name, _, workers = method.partition(":")
+    func = getattr(module, name)
+    baseline = _max_rss_mb()
+
+    start = time.perf_counter()
+    counts = func(file_path, int(workers)) if workers else func(file_path)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "seconds": seconds,
+        "counts": [int(c) for c in counts],
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(_max_rss_mb(), 1),
+    }))
+
+
+def time_method(method: str, file_path: str, rows: int, timeout: float) -> Dict:
+    """Run one method in a fresh interpreter and collect its result."""
+    result = {"rows": rows, "bytes": os.path.getsize(file_path), "method": method}
+    try:
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", method, file_path],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {**result, "status": "timeout"}
+
+    if child.returncode != 0:
+        error = (child.stderr.strip().splitlines() or ["exit code %d" % child.returncode])[-1]
+        return {**result, "status": "error", "error": error}
+
+    measured = json.loads(child.stdout.strip().splitlines()[-1])
+    return {
+        **result,
+        "status": "ok",
+        "seconds": round(measured["seconds"], 4),
+        "rows_per_sec": round(rows / measured["seconds"]) if measured["seconds"] else None,
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "baseline_rss_mb": measured["baseline_rss_mb"],
+        "counts": measured["counts"],
+    }
+
+
+def check_counts(size_results: List[Dict]) -> Dict:
+    """
+    Compare the counts of one dataset size. Methods outside KNOWN_DIFFERENCES
+    must all agree; a known method that differs from them is recorded with its
+    reason instead of failing the check.
+    """
+    checked, known = set(), {}
+    for result in size_results:
+        if result["status"] != "ok":
+            continue
+        name = result["method"].partition(":")[0]
+        if name in KNOWN_DIFFERENCES:
+            known[result["method"]] = tuple(result["counts"])
+        else:
+            checked.add(tuple(result["counts"]))
+
+    differences = {}
+    if len(checked) == 1:
+        expected = next(iter(checked))
+        differences = {
+            method: {"counts": list(counts), "expected": list(expected),
+                     "reason": KNOWN_DIFFERENCES[method.partition(":")[0]]}
+            for method, counts in known.items() if counts != expected
+        }
+    return {"consistent": len(checked) <= 1, "counts": sorted(checked),
+            "known_differences": differences}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the searchPine_* methods.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Dataset sizes to generate, in rows (up to 10,000,000)")
+    parser.add_argument("--methods", nargs="+",
+                        help="Methods to run (default: every searchPine_*); "
+                             "'name:N' passes N workers")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="Seconds before a method is recorded as timed out")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the data")
+    parser.add_argument("--data-dir", help="Keep generated CSVs here and reuse them")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    parser.add_argument("--worker", nargs=2, metavar=("METHOD", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    methods = args.methods or discover_methods()
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="tree-bench-")
+    os.makedirs(data_dir, exist_ok=True)
+
+    print(f"{'Rows':>10}  {'Method':<26}{'Time (s)':>10}{'Rows/s':>12}{'Peak RSS (MB)':>15}  Counts")
+    print("-" * 100)
+
+    results = []
+    checks = {}
+    try:
+        for rows in args.rows:
+            file_path = os.path.join(data_dir, f"trees_{rows}_{args.seed}.csv")
+            if not os.path.exists(file_path):
+                generate_csv(file_path, rows, args.seed)
+
+            size_results = []
+            for method in methods:
+                result = time_method(method, file_path, rows, args.timeout)
+                size_results.append(result)
+                if result["status"] == "ok":
+                    print(f"{rows:>10}  {method:<26}{result['seconds']:>10.3f}"
+                          f"{result['rows_per_sec']:>12}{result['peak_rss_mb']:>15.1f}  "
+                          f"{tuple(result['counts'])}")
+                else:
+                    print(f"{rows:>10}  {method:<26}{result['status']:>10}  {result.get('error', '')}")
+
+            results.extend(size_results)
+
+            checks[rows] = check_counts(size_results)
+            for method, difference in checks[rows]["known_differences"].items():
+                print(f"{'':>10}  known difference: {method} {tuple(difference['counts'])} "
+                      f"({difference['reason']})")
+            if not checks[rows]["consistent"]:
+                print(f"{'':>10}  !! methods disagree at {rows} rows: {checks[rows]['counts']}")
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "seed": args.seed,
+                "results": results,
+                "consistent": {rows: check["consistent"] for rows, check in checks.items()},
+                "known_differences": {
+                    rows: check["known_differences"] for rows, check in checks.items()
+                },
+            }, f, indent=2)
+
+    if not all(check["consistent"] for check in checks.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,32 @@
+import argparse
 import csv
+import io
+import mmap
+import os
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+PINE_PATTERN = re.compile(r'\bpine\b', re.IGNORECASE)
+DPW_OWNER = 'DPW Maintained'
+MONTEREY_PINE = 'Monterey Pine'
+
+
+# ------------------------------
+# Species helpers
+# ------------------------------
+def common_name(species):
+    """'Pinus radiata :: Monterey Pine' -> 'Monterey Pine'."""
+    return species.split("::")[-1].strip()
+
+
+def is_pine(name):
+    """True for common names containing the word 'pine' (not 'Pineapple Guava')."""
+    return bool(PINE_PATTERN.search(name))
+
 
 # ------------------------------
 # Implementation 1: re.findall
@@ -20,6 +45,38 @@ def searchPine_findall(file_path):
 
     return total, DPW, monterey_count
 
+# ------------------------------
+# Implementation 1b: re.finditer on a memory-mapped file
+# ------------------------------
+# One pass over the raw bytes: a record id, the owner field and a species field
+# naming a pine, each optionally quoted. Only pine records match at all.
+PINE_RECORD_PATTERN = re.compile(
+    rb'^"?\d+"?,'
+    rb'"?(?P<owner>[^",\r\n]*)"?,'
+    rb'"?(?P<species>[^",\r\n]*(?i:\bpine\b)[^",\r\n]*)"?[,\r\n]',
+    re.MULTILINE,
+)
+
+
+def searchPine_mmap(file_path):
+    total = DPW = monterey_count = 0
+    dpw_owner = DPW_OWNER.encode()
+    monterey = MONTEREY_PINE.encode()
+
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return total, DPW, monterey_count
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as text:
+            for match in PINE_RECORD_PATTERN.finditer(text):
+                total += 1
+                if match.group('owner').strip() == dpw_owner:
+                    DPW += 1
+                if match.group('species').split(b'::')[-1].strip() == monterey:
+                    monterey_count += 1
+
+    return total, DPW, monterey_count
+
 # ------------------------------
 # Implementation 2: csv.reader + regex
 # ------------------------------
@@ -56,6 +113,7 @@ def searchPine_pandas(file_path):
 
 
 
+# ------------------------------
 # Implementation 4: collections.Counter
 # ------------------------------
 def searchPine_counter(file_path):
@@ -64,13 +122,15 @@ def searchPine_counter(file_path):
 
     with open(file_path, newline='', encoding="utf-8") as f:
         reader = csv.reader(f)
-    for row in reader:
-        tree_type = row[2].strip().split(":")[-1]
-        owner = row[1].strip()
-    if 'pine' in tree_type.lower():
-        tree_counter[tree_type] += 1
-    if owner == 'DPW Maintained':
-        DPW += 1
+        for row in reader:
+            if len(row) < 3:
+                continue
+            tree_type = row[2].strip().split(":")[-1].strip()
+            owner = row[1].strip()
+            if is_pine(tree_type):
+                tree_counter[tree_type] += 1
+                if owner == 'DPW Maintained':
+                    DPW += 1
 
     total = sum(tree_counter.values())
     monterey_count = tree_counter.get('Monterey Pine', 0)
@@ -78,6 +138,320 @@ def searchPine_counter(file_path):
 
 
 
+# ------------------------------
+# Implementation 5: single-pass streaming histogram
+# ------------------------------
+CHUNK_SIZE = 1 << 20  # characters read per chunk
+
+
+class TreeHistogram:
+    """
+    Species, owner and species x owner counts gathered in one pass.
+    Memory grows with the number of distinct species and owners, not rows.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.species = Counter()
+        self.owners = Counter()
+        self.species_owner = Counter()
+
+    def add(self, species, owner, n=1):
+        self.rows += n
+        self.species[species] += n
+        self.owners[owner] += n
+        self.species_owner[(species, owner)] += n
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.species.update(other.species)
+        self.owners.update(other.owners)
+        self.species_owner.update(other.species_owner)
+        return self
+
+    def count(self, species=None, owner=None):
+        """
+        Rows whose species and owner satisfy the given filters; each filter
+        is a predicate on the value (the species filter sees the common
+        name), or None to accept everything.
+        """
+        return sum(
+            n for (sp, ow), n in self.species_owner.items()
+            if (species is None or species(common_name(sp)))
+            and (owner is None or owner(ow))
+        )
+
+    def by_common_name(self):
+        names = Counter()
+        for species, n in self.species.items():
+            names[common_name(species)] += n
+        return names
+
+    def pine_counts(self):
+        """(all pines, DPW-maintained pines, Monterey pines), as printed by print_info."""
+        total = self.count(species=is_pine)
+        DPW = self.count(species=is_pine, owner=lambda owner: owner == DPW_OWNER)
+        monterey_count = self.count(species=lambda name: name == MONTEREY_PINE)
+        return total, DPW, monterey_count
+
+
+def iter_chunked_lines(f, chunk_size=CHUNK_SIZE):
+    """Yield lines (with their endings) from f, reading chunk_size characters at a time."""
+    tail = ""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if tail:
+        yield tail
+
+
+def scan_rows(lines, skip_header=True):
+    """Build a TreeHistogram from CSV lines (legal status/owner in column 1, species in 2)."""
+    histogram = TreeHistogram()
+    reader = csv.reader(lines)
+    if skip_header:
+        next(reader, None)
+
+    for row in reader:
+        if len(row) < 3:
+            continue
+        histogram.add(row[2].strip(), row[1].strip())
+
+    return histogram
+
+
+def scan_trees(file_path, chunk_size=CHUNK_SIZE):
+    """Read the tree CSV once in bounded chunks and return its TreeHistogram."""
+    with open(file_path, newline='', encoding="utf-8") as f:
+        return scan_rows(iter_chunked_lines(f, chunk_size))
+
+
+# ------------------------------
+# Implementation 6: parallel scan over record-aligned byte ranges
+# ------------------------------
+class _RangeReader(io.RawIOBase):
+    """Raw binary reader limited to bytes [start, end) of a file."""
+
+    def __init__(self, file_path, start, end):
+        self._f = open(file_path, "rb")
+        self._f.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        n = self._f.readinto(memoryview(buffer)[:size])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def _count_quotes(file_path, start, end, block_size=CHUNK_SIZE):
+    """Number of '"' bytes in [start, end)."""
+    quotes = 0
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            quotes += block.count(b'"')
+            remaining -= len(block)
+    return quotes
+
+
+def _next_record_start(file_path, offset, inside_quotes, block_size=1 << 16):
+    """
+    First offset >= `offset` that begins a record: just past a newline that
+    is outside quotes. `inside_quotes` is the quote state at `offset`.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        position = offset
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return position
+            start = 0
+            while True:
+                newline = block.find(b"\n", start)
+                if newline < 0:
+                    break
+                inside_quotes ^= block.count(b'"', start, newline) % 2 == 1
+                if not inside_quotes:
+                    return position + newline + 1
+                start = newline + 1
+            inside_quotes ^= block.count(b'"', start) % 2 == 1
+            position += len(block)
+
+
+def split_ranges(file_path, parts, executor=None):
+    """
+    Split the file into at most `parts` byte ranges that start and end on
+    record boundaries. Quote parity at each nominal split point is found by
+    counting quotes per range (in parallel when an executor is given), so a
+    quoted field containing newlines is never cut in two.
+    """
+    size = os.path.getsize(file_path)
+    if parts <= 1 or size == 0:
+        return [(0, size)]
+
+    nominal = [size * i // parts for i in range(parts + 1)]
+    spans = list(zip(nominal[:-1], nominal[1:]))
+    mapper = executor.map if executor is not None else map
+    counts = list(mapper(_count_quotes, [file_path] * parts, *zip(*spans)))
+
+    starts = [0]
+    quotes_before = 0
+    for offset, count in zip(nominal[1:-1], counts):
+        quotes_before += count
+        start = _next_record_start(file_path, offset, quotes_before % 2 == 1)
+        if start > starts[-1]:
+            starts.append(start)
+
+    bounds = starts + [size]
+    return [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def scan_range(file_path, start, end, chunk_size=CHUNK_SIZE):
+    """TreeHistogram of the records in bytes [start, end); the header lives in range 0."""
+    raw = _RangeReader(file_path, start, end)
+    with io.TextIOWrapper(io.BufferedReader(raw), encoding="utf-8", newline="") as f:
+        return scan_rows(iter_chunked_lines(f, chunk_size), skip_header=start == 0)
+
+
+def scan_trees_parallel(file_path, workers=None, chunk_size=CHUNK_SIZE):
+    """scan_trees() across `workers` processes (default: every core), merging the results."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return scan_trees(file_path, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        ranges = split_ranges(file_path, workers, executor)
+        histogram = TreeHistogram()
+        for part in executor.map(
+            partial(scan_range, file_path, chunk_size=chunk_size), *zip(*ranges)
+        ):
+            histogram.merge(part)
+    return histogram
+
+
+def searchPine_streaming(file_path, workers=1):
+    return scan_trees_parallel(file_path, workers).pine_counts()
+
+# ------------------------------
+# Implementation 7: columnar pandas with categoricals
+# ------------------------------
+PANDAS_CHUNK_ROWS = 1_000_000
+CACHE_FORMATS = ("parquet", "feather")
+
+
+def columnar_cache_path(file_path, cache_format):
+    """test.csv -> test.trees.parquet (or .feather)."""
+    return f"{os.path.splitext(file_path)[0]}.trees.{cache_format}"
+
+
+def _read_columns(file_path, chunksize):
+    """Yield frames holding only the owner and species columns, as categoricals."""
+    frames = pd.read_csv(
+        file_path,
+        usecols=[1, 2],
+        dtype="category",
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
+    if chunksize is None:
+        frames = [frames]
+    for frame in frames:
+        frame.columns = ["owner", "species"]
+        yield frame
+
+
+def _histogram_from_frames(frames):
+    """
+    Count each (species, owner) pair with a groupby on the category codes;
+    stripping and predicates then run once per distinct pair, not per row.
+    """
+    histogram = TreeHistogram()
+    for frame in frames:
+        counts = frame.groupby(["species", "owner"], observed=True).size()
+        for (species, owner), n in counts.items():
+            histogram.add(species.strip(), owner.strip(), int(n))
+    return histogram
+
+
+def _cache_is_fresh(file_path, cache_path):
+    try:
+        return os.path.getmtime(cache_path) >= os.path.getmtime(file_path)
+    except OSError:
+        return False
+
+
+def _write_cache(frame, cache_path, cache_format):
+    """Write the categorical columns atomically; skip (with a warning) without pyarrow."""
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    try:
+        if cache_format == "parquet":
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.reset_index(drop=True).to_feather(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except ImportError as e:
+        print(f"[WARN] {cache_format} cache not written: {str(e).splitlines()[0]}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def scan_trees_pandas(file_path, chunksize=PANDAS_CHUNK_ROWS, cache_format=None):
+    """
+    TreeHistogram built with pandas from the owner and species columns only.
+    Reads `chunksize` rows at a time (None = all at once). With cache_format
+    ("parquet" or "feather") the two categorical columns are cached next to
+    the CSV and later runs read the cache instead of parsing the CSV.
+    """
+    if cache_format is None:
+        return _histogram_from_frames(_read_columns(file_path, chunksize))
+
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f"cache_format must be one of {CACHE_FORMATS}")
+
+    cache_path = columnar_cache_path(file_path, cache_format)
+    if _cache_is_fresh(file_path, cache_path):
+        if cache_format == "parquet":
+            frame = pd.read_parquet(cache_path)
+        else:
+            frame = pd.read_feather(cache_path)
+        return _histogram_from_frames([frame.astype("category")])
+
+    # Chunks are categorical codes only, so holding them all stays small.
+    chunks = list(_read_columns(file_path, chunksize))
+    frame = pd.DataFrame({
+        column: union_categoricals([chunk[column] for chunk in chunks])
+        for column in ("owner", "species")
+    }) if chunks else pd.DataFrame({"owner": [], "species": []}, dtype="category")
+
+    _write_cache(frame, cache_path, cache_format)
+    return _histogram_from_frames([frame])
+
+
+def searchPine_pandas_columnar(file_path, cache_format=None):
+    return scan_trees_pandas(file_path, cache_format=cache_format).pine_counts()
+
+
 # ------------------------------
 # Helper function: print results
 # ------------------------------
@@ -91,13 +465,23 @@ def print_info(total, DPW, monterey_count):
 # Main CLI
 # ------------------------------
 def main():
-    file_path = "test.csv"  # adjust path as needed
+    parser = argparse.ArgumentParser(description="Count pine trees in the SF street tree list.")
+    parser.add_argument("file_path", nargs="?", default="test.csv", help="Tree CSV (default: test.csv)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for the streaming histogram (0 = one per core)")
+    parser.add_argument("--cache", choices=CACHE_FORMATS,
+                        help="Cache the columnar pandas engine's columns (needs pyarrow)")
+    args = parser.parse_args()
+    file_path = args.file_path
 
     methods = {
         're.findall': searchPine_findall,
+        'mmap + bytes regex': searchPine_mmap,
         'csv + regex': searchPine_csv_regex,
         'pandas': searchPine_pandas,
-        'collections.Counter': searchPine_counter
+        'collections.Counter': searchPine_counter,
+        'streaming histogram': partial(searchPine_streaming, workers=args.workers),
+        'pandas columnar': partial(searchPine_pandas_columnar, cache_format=args.cache)
     }
 
     for name, func in methods.items():